@@ -74,27 +74,30 @@ def admin_interface():
                 print("Deletion cancelled")
                 
         elif choice == "5":
-            # System statistics
-            all_violations = db.get_violations(9999)  # Get all violations
+            # System statistics, aggregated by the database
+            total, avg_speed, avg_over = db.get_summary()
             print("\nSystem Statistics:")
-            print(f"Total violations recorded: {len(all_violations)}")
+            print(f"Total violations recorded: {total}")
             
-            if all_violations:
-                avg_speed = sum(v.speed for v in all_violations) / len(all_violations)
-                avg_over = sum(v.speed - v.speed_limit for v in all_violations) / len(all_violations)
+            if total:
                 print(f"Average detected speed: {avg_speed:.1f} km/h")
                 print(f"Average speed over limit: {avg_over:.1f} km/h")
                 
                 # Most frequent offenders
-                plates = {}
-                for v in all_violations:
-                    plates[v.license_plate] = plates.get(v.license_plate, 0) + 1
-                    
                 print("\nTop offenders:")
-                top_plates = sorted(plates.items(), key=lambda x: x[1], reverse=True)[:5]
-                for plate, count in top_plates:
+                for plate, count in db.get_top_plates(5):
                     print(f"License plate {plate}: {count} violations")
                 
+                print("\nViolations by location:")
+                for location, count, location_avg in db.get_location_histogram():
+                    print(f"{location}: {count} violations, average {location_avg:.1f} km/h")
+                
+                print("\nViolations by hour:")
+                hourly = db.get_hourly_histogram()
+                peak = max((count for _, count in hourly), default=0)
+                for hour, count in hourly:
+                    print(f"{hour:02d}:00 {'#' * max(1, count * 40 // peak)} {count}")
+                
         elif choice == "6":
             break
             
@@ -0,0 +1,79 @@
+# Query times on a synthetic million-row violations table, with and without indexes
+import os
+import sys
+import time
+import datetime
+import tempfile
+import numpy as np
+from sqlalchemy import insert
+from utils.database import ViolationDatabase, ViolationRecord
+
+LOCATIONS = ['Main Street', 'Highway 1', 'School Zone', 'Bridge Road', 'Airport Link']
+
+
+def populate(db, rows, seed=0, chunk=50000):
+    """Bulk insert synthetic violations spread over a year"""
+    rng = np.random.default_rng(seed)
+    start = datetime.datetime(2023, 1, 1)
+    plates = [f"AB{i:05d}" for i in range(rows // 20 + 1)]
+    with db.engine.begin() as connection:
+        for offset in range(0, rows, chunk):
+            n = min(chunk, rows - offset)
+            seconds = rng.integers(0, 365 * 24 * 3600, n)
+            plate_ids = rng.integers(0, len(plates), n)
+            location_ids = rng.integers(0, len(LOCATIONS), n)
+            speeds = rng.uniform(55, 120, n)
+            connection.execute(insert(ViolationRecord), [
+                {
+                    'license_plate': plates[plate_ids[i]],
+                    'speed': float(speeds[i]),
+                    'speed_limit': 50.0,
+                    'timestamp': start + datetime.timedelta(seconds=int(seconds[i])),
+                    'location': LOCATIONS[location_ids[i]],
+                    'image_path': None
+                }
+                for i in range(n)
+            ])
+
+
+def time_queries(db, repeats=5):
+    """Mean milliseconds for the dashboard, plate-search and per-location queries"""
+    since = datetime.datetime(2023, 6, 1)
+    queries = {
+        'recent 100': lambda: db.get_violations(limit=100),
+        'by plate': lambda: db.get_violations_by_plate('AB00042'),
+        'location range': lambda: db.session.query(ViolationRecord).filter(
+            ViolationRecord.location == 'School Zone',
+            ViolationRecord.timestamp >= since,
+            ViolationRecord.timestamp < since + datetime.timedelta(days=1)
+        ).all(),
+    }
+    results = {}
+    for name, query in queries.items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            query()
+        results[name] = (time.perf_counter() - start) / repeats * 1000
+    return results
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as directory:
+        db = ViolationDatabase(f"sqlite:///{os.path.join(directory, 'benchmark.db')}")
+
+        start = time.perf_counter()
+        populate(db, rows)
+        print(f"Inserted {rows} rows in {time.perf_counter() - start:.1f} s")
+
+        indexed = time_queries(db)
+
+        # Drop the indexes to compare against the old schema
+        for index in ViolationRecord.__table__.indexes:
+            index.drop(bind=db.engine)
+        unindexed = time_queries(db)
+
+        print("query           no index ms  indexed ms")
+        for name in indexed:
+            print(f"{name:15s} {unindexed[name]:11.2f} {indexed[name]:11.2f}")
+        db.close()
\ No newline at end of file
@@ -0,0 +1,79 @@
+# Plate candidate recall and ms/crop of the plate localisation methods
+import sys
+import time
+import cv2
+import numpy as np
+from models.license_plate_recognizer import PlateLocator
+
+
+def make_vehicle(rng, width, height):
+    """
+    Draw a synthetic vehicle crop with a plate in its lower half
+
+    Returns:
+        (image, (x, y, w, h) of the plate)
+    """
+    img = np.full((height, width, 3), rng.integers(40, 200, 3), dtype=np.uint8)
+    # Body panels, windows and lights as distracting edges
+    cv2.rectangle(img, (width // 10, height // 8), (width * 9 // 10, height * 2 // 5), (60, 60, 60), -1)
+    for x in (width // 8, width * 3 // 4):
+        cv2.rectangle(img, (x, height * 11 // 20), (x + width // 8, height * 13 // 20), (0, 0, 220), -1)
+
+    plate_w = int(width * rng.uniform(0.25, 0.35))
+    plate_h = int(plate_w / rng.uniform(2.5, 4.5))
+    x = (width - plate_w) // 2 + int(rng.integers(-width // 20, width // 20 + 1))
+    y = int(height * rng.uniform(0.65, 0.8))
+    cv2.rectangle(img, (x, y), (x + plate_w, y + plate_h), (235, 235, 235), -1)
+    cv2.rectangle(img, (x, y), (x + plate_w, y + plate_h), (20, 20, 20), max(2, plate_h // 12))
+    cv2.putText(img, 'AB12CDE', (x + plate_w // 12, y + plate_h * 3 // 4), cv2.FONT_HERSHEY_SIMPLEX,
+                plate_h / 45, (20, 20, 20), max(1, plate_h // 15))
+
+    noise = rng.normal(0, 6, img.shape)
+    img = np.clip(img + noise, 0, 255).astype(np.uint8)
+    return img, (x, y, plate_w, plate_h)
+
+
+def box_iou(a, b):
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    w = max(0, min(ax2, bx2) - max(a[0], b[0]))
+    h = max(0, min(ay2, by2) - max(a[1], b[1]))
+    intersection = w * h
+    return intersection / (a[2] * a[3] + b[2] * b[3] - intersection)
+
+
+def benchmark(locator, crops):
+    """
+    Run a locator over the crops
+
+    Returns:
+        (recall at IoU >= 0.5, mean milliseconds per crop)
+    """
+    found = 0
+    elapsed = 0.0
+    for img, plate in crops:
+        start = time.perf_counter()
+        box = locator.find(img)
+        elapsed += time.perf_counter() - start
+        if box is not None and box_iou(box, plate) >= 0.5:
+            found += 1
+    return found / len(crops), elapsed / len(crops) * 1000
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    crops = [make_vehicle(rng, width, int(width * rng.uniform(0.7, 0.9)))
+             for width in rng.integers(200, 900, 200)]
+
+    methods = {
+        'contour': PlateLocator(method='contour'),
+        'fast': PlateLocator(method='fast'),
+    }
+    # Pass a plate detector ONNX model to include the model backend
+    if len(sys.argv) > 1:
+        methods['model'] = PlateLocator(method='model', detector={'backend': 'onnxruntime', 'model': sys.argv[1]})
+
+    print("method    recall  ms/crop")
+    for name, locator in methods.items():
+        recall, ms = benchmark(locator, crops)
+        print(f"{name:8s}  {recall:6.2f}  {ms:7.3f}")
\ No newline at end of file
@@ -0,0 +1,52 @@
+# Writes the ground-plane lookup grid for a camera's homography calibration
+import argparse
+import os
+import cv2
+import numpy as np
+import yaml
+from models.calibration import compute_homography, build_ground_grid
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Build the pixel-to-metre lookup grid for a camera')
+    parser.add_argument('--config', type=str, default='config.yaml', help='Path to configuration file')
+    parser.add_argument('--output', type=str, help='Override speed.homography.grid_file from config')
+    parser.add_argument('--width', type=int, help='Frame width (read from the input source if omitted)')
+    parser.add_argument('--height', type=int, help='Frame height (read from the input source if omitted)')
+    return parser.parse_args()
+
+def frame_size_from_input(source):
+    cap = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    try:
+        if not cap.isOpened():
+            raise SystemExit(f"Error: Could not open video source {source}")
+        return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        cap.release()
+
+def main():
+    args = parse_args()
+    with open(args.config, 'r') as file:
+        config = yaml.safe_load(file)
+
+    homography_config = config['speed']['homography']
+    output_path = args.output or homography_config['grid_file']
+    step = homography_config.get('grid_step', 4)
+
+    if args.width and args.height:
+        width, height = args.width, args.height
+    else:
+        width, height = frame_size_from_input(config['input'])
+
+    homography = compute_homography(homography_config['image_points'], homography_config['world_points'])
+    grid = build_ground_grid(homography, width, height, step)
+
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    np.save(output_path, grid)
+
+    print("Homography (pixels -> metres):")
+    print(homography)
+    print(f"Wrote {grid.shape[1]}x{grid.shape[0]} lookup grid for {width}x{height} frames to {output_path}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
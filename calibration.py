@@ -0,0 +1,96 @@
+import numpy as np
+import cv2
+
+def compute_homography(image_points, world_points):
+    """
+    Compute the image-to-ground-plane homography for a camera
+
+    Args:
+        image_points: Four or more (x, y) pixel positions on the road surface
+        world_points: Matching (x, y) ground positions in metres
+
+    Returns:
+        3x3 homography matrix mapping pixels to metres
+    """
+    image_points = np.asarray(image_points, dtype=np.float32).reshape(-1, 2)
+    world_points = np.asarray(world_points, dtype=np.float32).reshape(-1, 2)
+    if len(image_points) < 4 or len(image_points) != len(world_points):
+        raise ValueError("Homography calibration needs four or more matching image/world point pairs")
+
+    homography, _ = cv2.findHomography(image_points, world_points, 0 if len(image_points) == 4 else cv2.RANSAC)
+    if homography is None:
+        raise ValueError("Could not compute homography from calibration points")
+    return homography
+
+def build_ground_grid(homography, width, height, step=4):
+    """
+    Precompute ground-plane coordinates for a regular grid of pixels
+
+    Args:
+        homography: 3x3 pixel-to-metre homography
+        width: Frame width in pixels
+        height: Frame height in pixels
+        step: Pixel spacing between grid nodes
+
+    Returns:
+        (rows, cols, 2) float32 array; node [i, j] holds the ground position
+        in metres of pixel (j * step, i * step)
+    """
+    cols = int(np.ceil(width / step)) + 1
+    rows = int(np.ceil(height / step)) + 1
+    xs, ys = np.meshgrid(np.arange(cols) * step, np.arange(rows) * step)
+    pixels = np.stack([xs, ys], axis=-1).reshape(-1, 1, 2).astype(np.float32)
+    world = cv2.perspectiveTransform(pixels, homography)
+    return world.reshape(rows, cols, 2).astype(np.float32)
+
+class GroundPlaneLookup:
+    """
+    Maps pixel positions to ground-plane metres through a precomputed,
+    memory-mapped grid, so per-frame conversion is a table lookup
+    """
+    def __init__(self, grid, step=4):
+        """
+        Initialize the lookup
+
+        Args:
+            grid: (rows, cols, 2) array from build_ground_grid
+            step: Pixel spacing the grid was built with
+        """
+        self.grid = grid
+        self.step = step
+        self.rows, self.cols = grid.shape[:2]
+
+    @classmethod
+    def load(cls, path, step=4):
+        """
+        Memory-map a grid file written by calibrate.py
+
+        Args:
+            path: Path to the .npy grid file
+            step: Pixel spacing the grid was built with
+        """
+        return cls(np.load(path, mmap_mode='r'), step)
+
+    def to_world(self, points):
+        """
+        Convert pixel positions to ground-plane positions
+
+        Args:
+            points: (N, 2) array of (x, y) pixel positions
+
+        Returns:
+            (N, 2) array of (x, y) ground positions in metres
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        grid_x = np.clip(points[:, 0] / self.step, 0, self.cols - 1)
+        grid_y = np.clip(points[:, 1] / self.step, 0, self.rows - 1)
+
+        # Bilinear interpolation between the four surrounding grid nodes
+        x0 = np.minimum(grid_x.astype(np.int64), self.cols - 2)
+        y0 = np.minimum(grid_y.astype(np.int64), self.rows - 2)
+        fx = (grid_x - x0)[:, None]
+        fy = (grid_y - y0)[:, None]
+
+        top = self.grid[y0, x0] * (1 - fx) + self.grid[y0, x0 + 1] * fx
+        bottom = self.grid[y0 + 1, x0] * (1 - fx) + self.grid[y0 + 1, x0 + 1] * fx
+        return top * (1 - fy) + bottom * fy
\ No newline at end of file
@@ -2,13 +2,26 @@
 import time
 import os
 from utils.database import ViolationDatabase
+from utils.event_feed import subscribe
 import threading
 import tkinter as tk
 from tkinter import ttk
 import datetime
+import types
+import yaml
+
+LOG_TAIL_BYTES = 64 * 1024  # Amount of notifications.log shown when the viewer opens
+
+def load_feed_address(config_path="config.yaml"):
+    """Event feed address from the detector's config, or None if the feed is disabled"""
+    if not os.path.exists(config_path):
+        return None
+    with open(config_path, "r") as f:
+        events = (yaml.safe_load(f) or {}).get("events", {})
+    return events.get("address") if events.get("enabled", False) else None
 
 class ViolationDashboard:
-    def __init__(self, root):
+    def __init__(self, root, feed_address=None):
         self.root = root
         self.root.title("Vehicle Violation Dashboard")
         self.root.geometry("800x600")
@@ -16,6 +29,16 @@ class ViolationDashboard:
         # Database connectionp
         self.db = ViolationDatabase()
         
+        # Keyset cursors: newest and oldest violation IDs shown in the tree
+        self.last_seen_id = 0
+        self.oldest_id = None
+        self.fetch_lock = threading.Lock()  # One fetch at a time, so no row is inserted twice
+        self.page_size = 100
+        
+        # Detector event feed; the database is only polled while it is unreachable
+        self.feed_address = feed_address
+        self.log_views = []  # Open notification log Text widgets receiving live events
+        
         # Create UI elements
         self.create_widgets()
         
@@ -67,9 +90,13 @@ class ViolationDashboard:
         control_frame.pack(fill="x", padx=10, pady=5)
         
         # Refresh button
-        refresh_btn = ttk.Button(control_frame, text="Refresh Now", command=self.update_data)
+        refresh_btn = ttk.Button(control_frame, text="Refresh Now", command=self.request_refresh)
         refresh_btn.pack(side="left", padx=5)
         
+        # Page back through history
+        older_btn = ttk.Button(control_frame, text="Load Older", command=self.request_older)
+        older_btn.pack(side="left", padx=5)
+        
         # Auto-refresh toggle
         self.auto_refresh = tk.BooleanVar(value=True)
         auto_cb = ttk.Checkbutton(control_frame, text="Auto Refresh", variable=self.auto_refresh)
@@ -79,37 +106,114 @@ class ViolationDashboard:
         log_btn = ttk.Button(control_frame, text="View Notification Log", command=self.show_notification_log)
         log_btn.pack(side="right", padx=5)
     
-    def update_data(self):
-        # Clear existing data
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Get latest violations
-        violations = self.db.get_violations(limit=100)
-        
-        # Insert into tree
+    def fetch_new(self):
+        """Query violations newer than the last one shown (runs off the Tk thread)"""
+        with self.fetch_lock:
+            if self.oldest_id is None:
+                # First load: the newest page, newest first
+                violations = self.db.get_violations_before(None, self.page_size)
+                if violations:
+                    self.oldest_id = violations[-1].id
+                violations = violations[::-1]
+            else:
+                violations = self.db.get_violations_after(self.last_seen_id)
+            if violations:
+                self.last_seen_id = violations[-1].id
+        # Schedule the insert on the main thread
+        self.root.after(0, self.insert_new, violations)
+    
+    def fetch_older(self):
+        """Query the page of violations before the oldest one shown (runs off the Tk thread)"""
+        with self.fetch_lock:
+            if self.oldest_id is None:
+                return
+            violations = self.db.get_violations_before(self.oldest_id, self.page_size)
+            if violations:
+                self.oldest_id = violations[-1].id
+        self.root.after(0, self.insert_older, violations)
+    
+    def request_refresh(self):
+        threading.Thread(target=self.fetch_new, daemon=True).start()
+    
+    def request_older(self):
+        threading.Thread(target=self.fetch_older, daemon=True).start()
+    
+    def row_values(self, v):
+        over_by = v.speed - v.speed_limit
+        timestamp = v.timestamp.strftime("%Y-%m-%d %H:%M:%S") if v.timestamp else "Unknown"
+        return (
+            v.id, 
+            v.license_plate, 
+            f"{v.speed:.1f}", 
+            f"{v.speed_limit:.1f}", 
+            f"+{over_by:.1f}", 
+            timestamp, 
+            v.location
+        )
+    
+    def insert_new(self, violations):
+        # Oldest first, each inserted at the top, so the newest ends up first
         for v in violations:
-            over_by = v.speed - v.speed_limit
-            timestamp = v.timestamp.strftime("%Y-%m-%d %H:%M:%S") if v.timestamp else "Unknown"
-            
-            self.tree.insert("", 0, values=(
-                v.id, 
-                v.license_plate, 
-                f"{v.speed:.1f}", 
-                f"{v.speed_limit:.1f}", 
-                f"+{over_by:.1f}", 
-                timestamp, 
-                v.location
-            ))
-        
-        # Update status
-        self.status_var.set(f"Last updated: {datetime.datetime.now().strftime('%H:%M:%S')} - {len(violations)} violations found")
+            if not self.tree.exists(str(v.id)):
+                self.tree.insert("", 0, iid=str(v.id), values=self.row_values(v))
+        self.update_status(f"{len(violations)} new")
+    
+    def insert_older(self, violations):
+        # Newest first, appended at the bottom
+        for v in violations:
+            if not self.tree.exists(str(v.id)):
+                self.tree.insert("", tk.END, iid=str(v.id), values=self.row_values(v))
+        self.update_status(f"{len(violations)} older loaded")
+    
+    def update_status(self, change):
+        self.status_var.set(f"Last updated: {datetime.datetime.now().strftime('%H:%M:%S')} - "
+                            f"{change}, {len(self.tree.get_children())} violations shown")
+    
+    def on_event(self, offset, event):
+        """Handle a violation event from the feed (runs off the Tk thread)"""
+        with self.fetch_lock:
+            if offset <= self.last_seen_id:
+                return
+            gap = offset > self.last_seen_id + 1
+            if not gap:
+                self.last_seen_id = offset
+                if self.oldest_id is None:
+                    self.oldest_id = offset
+        if gap:
+            # Events older than the feed's history were missed; catch up from the database
+            self.fetch_new()
+            return
+        
+        row = types.SimpleNamespace(
+            id=offset,
+            license_plate=event['license_plate'],
+            speed=event['speed'],
+            speed_limit=event['speed_limit'],
+            timestamp=datetime.datetime.fromisoformat(event['timestamp']),
+            location=event['location']
+        )
+        self.root.after(0, self.insert_new, [row])
+        if event.get('notified'):
+            # Only violations NotificationSystem actually logged belong in the notification log
+            self.root.after(0, self.append_log, row)
     
     def update_data_thread(self):
         while self.running:
             if self.auto_refresh.get():
-                # Schedule update on the main thread
-                self.root.after(0, self.update_data)
+                # Query in this thread; only the inserts run on the main thread
+                self.fetch_new()
+                
+                if self.feed_address:
+                    # Follow the detector's events until it disconnects
+                    try:
+                        for offset, event in subscribe(self.feed_address, self.last_seen_id + 1):
+                            # Checked on every event and heartbeat (at least once a second)
+                            if not self.running or not self.auto_refresh.get():
+                                break
+                            if offset is not None:
+                                self.on_event(offset, event)
+                    except OSError:
+                        pass  # Detector not running; poll the database instead
             time.sleep(5)  # Update every 5 seconds
     
     def show_notification_log(self):
@@ -126,14 +230,27 @@ class ViolationDashboard:
         log_text.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Load log content
+        # Load the end of the log; newer violations are appended from the event feed
         log_path = os.path.join("output", "notifications.log")
         if os.path.exists(log_path):
-            with open(log_path, "r") as f:
-                log_content = f.read()
+            with open(log_path, "rb") as f:
+                f.seek(max(0, os.path.getsize(log_path) - LOG_TAIL_BYTES))
+                log_content = f.read().decode(errors="replace")
                 log_text.insert(tk.END, log_content)
         else:
-            log_text.insert(tk.END, "No notification log found.")
+            log_text.insert(tk.END, "No notification log found.\n")
+        
+        self.log_views.append(log_text)
+        log_text.bind("<Destroy>", lambda e: self.log_views.remove(log_text) if log_text in self.log_views else None)
+    
+    def append_log(self, v):
+        # Same format as NotificationSystem writes to notifications.log
+        message = (f"VIOLATION: {v.timestamp.strftime('%Y-%m-%d %H:%M:%S')} - License Plate: {v.license_plate}, "
+                   f"Speed: {v.speed} km/h, Limit: {v.speed_limit} km/h, "
+                   f"Location: {v.location}\n")
+        for log_text in self.log_views:
+            log_text.insert(tk.END, message)
+            log_text.see(tk.END)
     
     def on_closing(self):
         self.running = False
@@ -142,6 +259,6 @@ class ViolationDashboard:
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = ViolationDashboard(root)
+    app = ViolationDashboard(root, feed_address=load_feed_address())
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
\ No newline at end of file
@@ -1,43 +1,88 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
+from sqlalchemy import create_engine, event, func, extract, select, Column, Integer, String, Float, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from concurrent.futures import Future
 import datetime
+import queue
+import threading
+import time
 
 Base = declarative_base()
 
 class ViolationRecord(Base):
     """Database model for speed violations"""
     __tablename__ = 'violations'
+    __table_args__ = (
+        Index('ix_violations_location_timestamp', 'location', 'timestamp'),
+    )
     
     id = Column(Integer, primary_key=True)
-    license_plate = Column(String)
+    license_plate = Column(String, index=True)
     speed = Column(Float)
     speed_limit = Column(Float)
-    timestamp = Column(DateTime)
+    timestamp = Column(DateTime, index=True)
     location = Column(String)
     image_path = Column(String)
     
     def __repr__(self):
         return f"<Violation(license_plate='{self.license_plate}', speed={self.speed})>"
 
+# SQLite settings for one writer (the detector) alongside readers (dashboard, admin)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # Readers don't block the writer and vice versa
+    'synchronous': 'NORMAL',  # Safe with WAL; fsync at checkpoints instead of every commit
+    'busy_timeout': 5000,  # Milliseconds to wait for a lock instead of failing
+    'cache_size': -20000,  # About 20 MB page cache
+    'temp_store': 'MEMORY'
+}
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def migrate(engine):
+    """
+    Bring an existing database up to the current schema: create missing
+    tables and add indexes that older databases were created without
+    
+    Args:
+        engine: SQLAlchemy engine
+    """
+    Base.metadata.create_all(engine)
+    for index in ViolationRecord.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
 class ViolationDatabase:
     """Handles database operations for vehicle violations"""
-    def __init__(self, db_path='sqlite:///violations.db'):
+    def __init__(self, db_path='sqlite:///violations.db', batch_size=32, max_delay=0.5):
         """
         Initialize database connection
         
         Args:
             db_path: SQLAlchemy database connection string
+            batch_size: Maximum violations written per commit by the writer thread
+            max_delay: Maximum seconds a violation waits for its batch to fill
         """
         self.engine = create_engine(db_path)
-        Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _set_sqlite_pragmas)
+        migrate(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.session = self.Session()
+        
+        # Write-behind queue drained by a writer thread, started on first write
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.write_queue = queue.Queue()
+        self.writer = None
+        self.writer_lock = threading.Lock()
         print(f"Database initialized at {db_path}")
     
     def record_violation(self, license_plate, speed, speed_limit, location="Unknown", image_path=None):
         """
-        Record a new speed violation
+        Queue a new speed violation for the background writer
         
         Args:
             license_plate: Vehicle license plate
@@ -47,7 +92,8 @@ class ViolationDatabase:
             image_path: Path to saved violation image
             
         Returns:
-            ID of the new violation record
+            concurrent.futures.Future resolving to the ID of the new violation
+            record once its batch is committed
         """
         violation = ViolationRecord(
             license_plate=license_plate,
@@ -58,9 +104,69 @@ class ViolationDatabase:
             image_path=image_path
         )
         
-        self.session.add(violation)
-        self.session.commit()
-        return violation.id
+        future = Future()
+        self._start_writer()
+        self.write_queue.put((violation, future))
+        return future
+    
+    def flush(self, timeout=None):
+        """
+        Wait until all violations queued so far are committed
+        
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+        """
+        if self.writer is None:
+            return
+        marker = Future()
+        self.write_queue.put((None, marker))
+        marker.result(timeout)
+    
+    def _start_writer(self):
+        with self.writer_lock:
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._write_loop, name='violation-writer', daemon=True)
+                self.writer.start()
+    
+    def _write_loop(self):
+        """Group-commit queued violations until close() sends the stop sentinel"""
+        # Own session (sessions must not be shared across threads); keeping
+        # attributes after commit lets violation.id be read without a SELECT per row
+        session = sessionmaker(bind=self.engine, expire_on_commit=False)()
+        running = True
+        while running:
+            batch = [self.write_queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while batch[-1] is not None and batch[-1][0] is not None and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.write_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # None stops the writer; (None, future) is a flush marker
+            if batch[-1] is None:
+                running = False
+                batch.pop()
+            markers = [future for violation, future in batch if violation is None]
+            batch = [(violation, future) for violation, future in batch if violation is not None]
+            
+            if batch:
+                try:
+                    session.add_all([violation for violation, _ in batch])
+                    session.commit()
+                    for violation, future in batch:
+                        future.set_result(violation.id)
+                except Exception as e:
+                    session.rollback()
+                    print(f"Error writing violations: {e}")
+                    for _, future in batch:
+                        future.set_exception(e)
+            for future in markers:
+                future.set_result(None)
+        session.close()
     
     def get_violations(self, limit=100):
         """
@@ -76,6 +182,49 @@ class ViolationDatabase:
             ViolationRecord.timestamp.desc()
         ).limit(limit).all()
     
+    # Columns returned by the lightweight listing queries
+    LIST_COLUMNS = (ViolationRecord.id, ViolationRecord.license_plate, ViolationRecord.speed,
+                    ViolationRecord.speed_limit, ViolationRecord.timestamp, ViolationRecord.location)
+    
+    def get_violations_after(self, last_id, limit=500):
+        """
+        Get violations newer than a known ID, for incremental refreshes
+        
+        Runs in a fresh session (safe to call from any thread) and returns
+        plain rows, so results are never stale ORM objects.
+        
+        Args:
+            last_id: Highest violation ID already seen (0 for none)
+            limit: Maximum number of rows to return
+            
+        Returns:
+            List of rows (id, license_plate, speed, speed_limit, timestamp,
+            location) ordered by ID, oldest first
+        """
+        with self.Session() as session:
+            return session.execute(
+                select(*self.LIST_COLUMNS).where(ViolationRecord.id > last_id)
+                .order_by(ViolationRecord.id).limit(limit)
+            ).all()
+    
+    def get_violations_before(self, before_id=None, limit=100):
+        """
+        Get a page of violations older than a known ID (keyset pagination)
+        
+        Args:
+            before_id: Lowest violation ID already shown, or None for the newest page
+            limit: Page size
+            
+        Returns:
+            List of rows (id, license_plate, speed, speed_limit, timestamp,
+            location) ordered by ID, newest first
+        """
+        query = select(*self.LIST_COLUMNS)
+        if before_id is not None:
+            query = query.where(ViolationRecord.id < before_id)
+        with self.Session() as session:
+            return session.execute(query.order_by(ViolationRecord.id.desc()).limit(limit)).all()
+    
     def get_violation_by_id(self, violation_id):
         """
         Get a specific violation by ID
@@ -104,6 +253,61 @@ class ViolationDatabase:
             ViolationRecord.license_plate == license_plate
         ).order_by(ViolationRecord.timestamp.desc()).all()
     
+    def get_summary(self):
+        """
+        Get overall violation statistics, computed in the database
+        
+        Returns:
+            Tuple of (violation count, average speed, average km/h over the
+            limit); the averages are None when there are no violations
+        """
+        count, avg_speed, avg_over = self.session.query(
+            func.count(ViolationRecord.id),
+            func.avg(ViolationRecord.speed),
+            func.avg(ViolationRecord.speed - ViolationRecord.speed_limit)
+        ).one()
+        return count, avg_speed, avg_over
+    
+    def get_top_plates(self, limit=5):
+        """
+        Get the license plates with the most violations
+        
+        Args:
+            limit: Number of plates to return
+            
+        Returns:
+            List of (license plate, violation count) tuples, most violations first
+        """
+        count = func.count(ViolationRecord.id)
+        return [tuple(row) for row in self.session.query(ViolationRecord.license_plate, count).group_by(
+            ViolationRecord.license_plate
+        ).order_by(count.desc()).limit(limit).all()]
+    
+    def get_hourly_histogram(self):
+        """
+        Get violation counts by hour of day
+        
+        Returns:
+            List of (hour 0-23, violation count) tuples for hours with violations
+            (rows without a timestamp are not counted)
+        """
+        hour = extract('hour', ViolationRecord.timestamp)
+        return [(int(h), n) for h, n in self.session.query(hour, func.count(ViolationRecord.id)).filter(
+            ViolationRecord.timestamp.isnot(None)
+        ).group_by(hour).order_by(hour).all()]
+    
+    def get_location_histogram(self):
+        """
+        Get violation counts and average speed by location
+        
+        Returns:
+            List of (location, violation count, average speed) tuples, most violations first
+        """
+        count = func.count(ViolationRecord.id)
+        return [tuple(row) for row in self.session.query(
+            ViolationRecord.location, count, func.avg(ViolationRecord.speed)
+        ).group_by(ViolationRecord.location).order_by(count.desc()).all()]
+    
     def delete_violation(self, violation_id):
         """
         Delete a violation record
@@ -122,5 +326,10 @@ class ViolationDatabase:
         return False
     
     def close(self):
-        """Close the database session"""
+        """Write any queued violations, then close the database sessions"""
+        with self.writer_lock:
+            writer, self.writer = self.writer, None
+        if writer is not None:
+            self.write_queue.put(None)
+            writer.join()
         self.session.close()
\ No newline at end of file
@@ -1,12 +1,176 @@
-import torch
-from ultralytics import YOLO
 import numpy as np
+import cv2
+import threading
+from models.detector_backends import create_backend
+
+class Detections:
+    """
+    Array-backed detections for a single frame
+    
+    Rows of the (N, 6) float32 array are (x1, y1, x2, y2, confidence, class_id).
+    Iterating yields the list-of-dicts form used by existing callers.
+    """
+    def __init__(self, data=None):
+        """
+        Initialize the detections
+        
+        Args:
+            data: Array-like of shape (N, 6), or None for no detections
+        """
+        if data is None:
+            data = np.empty((0, 6), dtype=np.float32)
+        self.data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+    
+    @classmethod
+    def from_list(cls, detections):
+        """Build detections from a list of detection dictionaries"""
+        return cls([(*d['bbox'], d['confidence'], d['class_id']) for d in detections])
+    
+    @property
+    def boxes(self):
+        """(N, 4) array of boxes in xyxy format"""
+        return self.data[:, :4]
+    
+    @property
+    def confidences(self):
+        """(N,) array of confidence scores"""
+        return self.data[:, 4]
+    
+    @property
+    def class_ids(self):
+        """(N,) array of integer class IDs"""
+        return self.data[:, 5].astype(np.int64)
+    
+    def to_list(self):
+        """
+        Compatibility view as a list of detection dictionaries
+        
+        Returns:
+            List of dictionaries with 'bbox', 'confidence' and 'class_id'
+        """
+        boxes = self.boxes.astype(np.int64).tolist()
+        confidences = self.confidences.tolist()
+        class_ids = self.class_ids.tolist()
+        return [
+            {'bbox': tuple(bbox), 'confidence': confidence, 'class_id': class_id}
+            for bbox, confidence, class_id in zip(boxes, confidences, class_ids)
+        ]
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def __iter__(self):
+        return iter(self.to_list())
+    
+    def __repr__(self):
+        return f"<Detections(n={len(self)})>"
+
+def points_in_polygon(points, polygon):
+    """
+    Even-odd point-in-polygon test, vectorized over the points
+    
+    Args:
+        points: (N, 2) array of (x, y) points
+        polygon: (M, 2) array of polygon vertices
+        
+    Returns:
+        (N,) boolean array, True for points inside the polygon
+    """
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    prev = polygon[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for vertex in polygon:
+            # Edges that straddle the point's row and lie to its right toggle the state
+            straddles = (vertex[1] > y) != (prev[1] > y)
+            x_cross = (prev[0] - vertex[0]) * (y - vertex[1]) / (prev[1] - vertex[1]) + vertex[0]
+            inside ^= straddles & (x < x_cross)
+            prev = vertex
+    return inside
+
+class RegionOfInterest:
+    """
+    Crops frames to the enforcement area before detection and drops
+    detections whose centroid lies outside the enforcement lanes
+    """
+    def __init__(self, polygons, lanes=None, scale=1.0):
+        """
+        Initialize the region of interest
+        
+        Args:
+            polygons: List of polygons [[x, y], ...] in full-frame pixels; frames
+                      are cropped to their combined bounding rectangle
+            lanes: List of enforcement lane polygons; defaults to polygons
+            scale: Factor (<= 1) by which the crop is downscaled before inference
+        """
+        self.polygons = [np.asarray(p, dtype=np.float32).reshape(-1, 2) for p in polygons]
+        self.lanes = [np.asarray(p, dtype=np.float32).reshape(-1, 2) for p in lanes] if lanes else self.polygons
+        self.scale = scale
+        
+        points = np.concatenate(self.polygons)
+        self.x1, self.y1 = np.floor(points.min(axis=0)).astype(int)
+        self.x2, self.y2 = np.ceil(points.max(axis=0)).astype(int)
+    
+    @classmethod
+    def from_config(cls, roi_config):
+        """
+        Build a region of interest from the detection.roi config section
+        
+        Returns:
+            RegionOfInterest, or None if no polygons are configured
+        """
+        if not roi_config or not roi_config.get('polygons'):
+            return None
+        return cls(roi_config['polygons'], roi_config.get('lanes'), roi_config.get('scale', 1.0))
+    
+    def crop(self, frame):
+        """
+        Crop (and optionally downscale) a frame to the region of interest
+        
+        Args:
+            frame: OpenCV image (numpy array)
+            
+        Returns:
+            Tuple of (cropped image, (x, y) offset of the crop in the frame)
+        """
+        height, width = frame.shape[:2]
+        x1, y1 = max(0, self.x1), max(0, self.y1)
+        x2, y2 = min(width, self.x2), min(height, self.y2)
+        cropped = frame[y1:y2, x1:x2]
+        if self.scale != 1.0:
+            cropped = cv2.resize(cropped, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return cropped, (x1, y1)
+    
+    def to_frame(self, detections, offset):
+        """
+        Map detections from crop coordinates back to the full frame and drop
+        those whose centroid falls outside every enforcement lane
+        
+        Args:
+            detections: Detections in crop coordinates
+            offset: (x, y) offset returned by crop
+            
+        Returns:
+            Detections in full-frame coordinates
+        """
+        data = detections.data.copy()
+        data[:, :4] /= self.scale
+        data[:, [0, 2]] += offset[0]
+        data[:, [1, 3]] += offset[1]
+        
+        centroids = np.stack([(data[:, 0] + data[:, 2]) / 2, (data[:, 1] + data[:, 3]) / 2], axis=1)
+        keep = np.zeros(len(data), dtype=bool)
+        for lane in self.lanes:
+            keep |= points_in_polygon(centroids, lane)
+        
+        return Detections(data[keep])
 
 class VehicleDetector:
     """
     Handles vehicle detection using YOLOv8 model
     """
-    def __init__(self, model_name='yolov8n', confidence_threshold=0.5, classes=None):
+    def __init__(self, model_name='yolov8n', confidence_threshold=0.5, classes=None, batch_size=1, roi=None,
+                 backend='ultralytics', backend_options=None):
         """
         Initialize the vehicle detector
         
@@ -15,12 +179,45 @@ class VehicleDetector:
             confidence_threshold: Minimum confidence score for detection
             classes: List of class IDs to detect (COCO dataset class IDs)
                      [2: car, 3: motorcycle, 5: bus, 7: truck]
+            batch_size: Maximum number of frames sent to the model in one forward pass
+            roi: Optional RegionOfInterest to crop frames to before inference
+            backend: Inference backend ('ultralytics' or 'onnxruntime')
+            backend_options: Backend-specific options (see detector_backends.create_backend)
         """
-        print(f"Loading {model_name} model...")
-        self.model = YOLO(model_name)
+        self.model_name = model_name
+        self.backend_name = backend
+        self.backend_options = backend_options
         self.confidence_threshold = confidence_threshold
         self.classes = classes  # List of class IDs to detect
-        print(f"Model loaded. Detecting classes: {classes}")
+        self.batch_size = max(1, int(batch_size))
+        self.roi = roi
+        self._backend = None  # Loaded on first use or by warm_up()
+        self._backend_lock = threading.Lock()
+        # Serializes inference, so the background warm-up never runs concurrently
+        # with a real detection (the models are not thread-safe)
+        self._predict_lock = threading.Lock()
+    
+    @property
+    def backend(self):
+        """Inference backend, loaded on first access (concurrent callers wait for one load)"""
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    print(f"Loading {self.model_name} model with {self.backend_name} backend...")
+                    self._backend = create_backend(self.backend_name, self.model_name, self.confidence_threshold,
+                                                   self.classes, self.backend_options)
+                    print(f"Model loaded. Detecting classes: {self.classes}")
+        return self._backend
+    
+    def warm_up(self, frame_size=(640, 640)):
+        """
+        Load the model and run one inference so the first real frame is fast
+        
+        Args:
+            frame_size: (width, height) of the dummy frame
+        """
+        with self._predict_lock:
+            self.backend.predict([np.zeros((frame_size[1], frame_size[0], 3), dtype=np.uint8)])
     
     def detect(self, frame):
         """
@@ -30,28 +227,38 @@ class VehicleDetector:
             frame: OpenCV image (numpy array)
             
         Returns:
-            List of dictionaries containing detection information
-        """
-        # Run detection
-        results = self.model(frame, conf=self.confidence_threshold, classes=self.classes)
-        
-        # Process results
-        detections = []
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                # Get box coordinates (xyxy format)
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                
-                # Get confidence and class
-                confidence = float(box.conf[0])
-                class_id = int(box.cls[0])
-                
-                # Add to detections
-                detections.append({
-                    'bbox': (int(x1), int(y1), int(x2), int(y2)),
-                    'confidence': confidence,
-                    'class_id': class_id
-                })
-        
-        return detections
\ No newline at end of file
+            Detections for the frame (iterates as detection dictionaries)
+        """
+        return self.detect_batch([frame])[0]
+    
+    def detect_batch(self, frames):
+        """
+        Detect vehicles in several frames, running them through the model in
+        batches of up to batch_size frames per forward pass
+        
+        Args:
+            frames: List of OpenCV images (numpy arrays), possibly from different streams
+            
+        Returns:
+            List with one Detections object per input frame
+        """
+        batch_detections = []
+        for start in range(0, len(frames), self.batch_size):
+            batch = list(frames[start:start + self.batch_size])
+            
+            # Only run inference on the region of interest
+            offsets = None
+            if self.roi is not None:
+                batch, offsets = zip(*(self.roi.crop(frame) for frame in batch))
+                batch = list(batch)
+            
+            with self._predict_lock:
+                results = self.backend.predict(batch)
+            
+            for i, data in enumerate(results):
+                detections = Detections(data)
+                if offsets is not None:
+                    detections = self.roi.to_frame(detections, offsets[i])
+                batch_detections.append(detections)
+        
+        return batch_detections
\ No newline at end of file
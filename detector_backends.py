@@ -0,0 +1,225 @@
+import numpy as np
+import cv2
+
+class UltralyticsBackend:
+    """
+    Runs a YOLOv8 model through the ultralytics/PyTorch stack
+    """
+    def __init__(self, model_name='yolov8n', confidence_threshold=0.5, classes=None):
+        """
+        Initialize the backend
+
+        Args:
+            model_name: YOLOv8 model variant or weights path
+            confidence_threshold: Minimum confidence score for detection
+            classes: List of class IDs to keep, or None for all
+        """
+        from ultralytics import YOLO
+        self.model = YOLO(model_name)
+        self.confidence_threshold = confidence_threshold
+        self.classes = classes
+
+    def predict(self, frames):
+        """
+        Run detection on a list of frames in one forward pass
+
+        Args:
+            frames: List of OpenCV images (numpy arrays)
+
+        Returns:
+            List with one (N, 6) array of (x1, y1, x2, y2, confidence, class_id) per frame
+        """
+        import torch
+
+        results = self.model(frames, conf=self.confidence_threshold, classes=self.classes)
+
+        # Ultralytics returns one result per input image, in order
+        outputs = []
+        for r in results:
+            boxes = r.boxes
+            if len(boxes) == 0:
+                outputs.append(np.empty((0, 6), dtype=np.float32))
+                continue
+
+            # Stack boxes, confidences and classes on the device and copy them
+            # to the host in a single transfer
+            data = torch.cat([boxes.xyxy, boxes.conf[:, None], boxes.cls[:, None]], dim=1)
+            outputs.append(data.cpu().numpy())
+        return outputs
+
+
+def non_max_suppression(boxes, scores, iou_threshold=0.7, max_det=300):
+    """
+    Greedy non-maximum suppression
+
+    Args:
+        boxes: (N, 4) array of boxes in xyxy format
+        scores: (N,) array of scores
+        iou_threshold: Boxes overlapping a kept box by more than this are suppressed
+        max_det: Maximum number of boxes to keep
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size > 0 and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        intersection = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = intersection / (areas[i] + areas[rest] - intersection + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+class OnnxRuntimeBackend:
+    """
+    Runs an exported YOLOv8 ONNX model with onnxruntime, without PyTorch
+    """
+    # Offset separating classes so NMS never suppresses across classes
+    CLASS_OFFSET = 7680
+
+    def __init__(self, model_path='yolov8n.onnx', confidence_threshold=0.5, classes=None,
+                 input_size=640, dynamic=False, iou_threshold=0.7,
+                 intra_op_threads=0, inter_op_threads=0, providers=None):
+        """
+        Initialize the backend
+
+        Args:
+            model_path: Path to a YOLOv8 model exported with format='onnx'
+            confidence_threshold: Minimum confidence score for detection
+            classes: List of class IDs to keep, or None for all
+            input_size: Letterbox size (long side) of the model input
+            dynamic: Pad frames only to a multiple of 32 instead of a square
+                     input_size (requires a model exported with dynamic=True)
+            iou_threshold: IoU threshold for non-maximum suppression
+            intra_op_threads: Threads used within an operator (0 lets onnxruntime decide)
+            inter_op_threads: Threads used across operators (0 lets onnxruntime decide)
+            providers: onnxruntime execution providers, e.g. ['OpenVINOExecutionProvider']
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=providers or ['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        input_shape = self.session.get_inputs()[0].shape
+        self.dynamic_batch = not isinstance(input_shape[0], int)
+
+        self.confidence_threshold = confidence_threshold
+        self.classes = np.asarray(classes, dtype=np.int64) if classes is not None else None
+        self.input_size = input_size
+        self.dynamic = dynamic
+        self.iou_threshold = iou_threshold
+
+    def _letterbox(self, frame, shape):
+        """Resize keeping aspect ratio and pad to shape (height, width)"""
+        height, width = frame.shape[:2]
+        gain = min(shape[0] / height, shape[1] / width)
+        new_w, new_h = int(round(width * gain)), int(round(height * gain))
+        pad_x, pad_y = (shape[1] - new_w) / 2, (shape[0] - new_h) / 2
+
+        if (new_w, new_h) != (width, height):
+            frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+        left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+        frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+        return frame, gain, (left, top)
+
+    def _input_shape(self, frame):
+        if not self.dynamic:
+            return (self.input_size, self.input_size)
+        height, width = frame.shape[:2]
+        gain = self.input_size / max(height, width)
+        return (int(np.ceil(height * gain / 32) * 32), int(np.ceil(width * gain / 32) * 32))
+
+    def _postprocess(self, prediction, gain, pad, frame_shape):
+        """Turn one (4 + classes, anchors) output into an (N, 6) detection array"""
+        prediction = prediction.T
+        scores = prediction[:, 4:]
+        if self.classes is not None:
+            class_ids = self.classes[scores[:, self.classes].argmax(axis=1)]
+        else:
+            class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+
+        mask = confidences > self.confidence_threshold
+        if not mask.any():
+            return np.empty((0, 6), dtype=np.float32)
+        xywh, confidences, class_ids = prediction[mask, :4], confidences[mask], class_ids[mask]
+
+        boxes = np.empty_like(xywh)
+        boxes[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+        boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+
+        keep = non_max_suppression(boxes + class_ids[:, None] * self.CLASS_OFFSET,
+                                   confidences, self.iou_threshold)
+        boxes, confidences, class_ids = boxes[keep], confidences[keep], class_ids[keep]
+
+        # Undo letterboxing
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / gain
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / gain
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, frame_shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, frame_shape[0])
+
+        return np.column_stack([boxes, confidences, class_ids]).astype(np.float32)
+
+    def predict(self, frames):
+        """
+        Run detection on a list of frames
+
+        Args:
+            frames: List of OpenCV images (numpy arrays)
+
+        Returns:
+            List with one (N, 6) array of (x1, y1, x2, y2, confidence, class_id) per frame
+        """
+        prepared = []
+        for frame in frames:
+            image, gain, pad = self._letterbox(frame, self._input_shape(frame))
+            blob = cv2.cvtColor(image, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)
+            prepared.append((np.ascontiguousarray(blob, dtype=np.float32) / 255.0, gain, pad))
+
+        # Stack same-shaped inputs into one run when the model allows it
+        same_shape = len({blob.shape for blob, _, _ in prepared}) == 1
+        if self.dynamic_batch and same_shape:
+            batch = np.stack([blob for blob, _, _ in prepared])
+            predictions = self.session.run(None, {self.input_name: batch})[0]
+        else:
+            predictions = [self.session.run(None, {self.input_name: blob[None]})[0][0]
+                           for blob, _, _ in prepared]
+
+        return [self._postprocess(prediction, gain, pad, frame.shape)
+                for prediction, (_, gain, pad), frame in zip(predictions, prepared, frames)]
+
+
+def create_backend(name, model_name='yolov8n', confidence_threshold=0.5, classes=None, options=None):
+    """
+    Create a detection backend by name
+
+    Args:
+        name: 'ultralytics' or 'onnxruntime'
+        model_name: YOLOv8 model variant for the ultralytics backend
+        confidence_threshold: Minimum confidence score for detection
+        classes: List of class IDs to keep
+        options: Backend-specific keyword arguments (e.g. the detection.onnx config)
+
+    Returns:
+        Backend instance with a predict(frames) method
+    """
+    options = dict(options or {})
+    if name == 'ultralytics':
+        return UltralyticsBackend(model_name, confidence_threshold, classes)
+    if name == 'onnxruntime':
+        model_path = options.pop('model', f"{model_name}.onnx")
+        return OnnxRuntimeBackend(model_path, confidence_threshold, classes, **options)
+    raise ValueError(f"Unknown detection backend: {name}")
\ No newline at end of file
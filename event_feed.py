@@ -0,0 +1,173 @@
+# Save this as utils/event_feed.py
+import errno
+import json
+import os
+import socket
+import socketserver
+import threading
+from collections import deque
+
+HEARTBEAT_INTERVAL = 1.0  # Seconds between heartbeats sent to idle subscribers
+HEARTBEAT_LINE = b'{"heartbeat": true}\n'
+
+def parse_address(address):
+    """Turn a 'host:port' string into a TCP address; anything else is a Unix socket path"""
+    if isinstance(address, (list, tuple)):
+        return tuple(address)
+    if ':' in address:
+        host, port = address.rsplit(':', 1)
+        return host, int(port)
+    return address
+
+def _remove_stale_socket(path):
+    """
+    Remove a Unix socket left behind by a publisher that is no longer running
+
+    Raises:
+        OSError: EADDRINUSE if a publisher is still listening on the path
+    """
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)  # Nobody listening: stale socket from a previous run
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, f"Event feed already running on {path}")
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+class EventPublisher:
+    """
+    Publishes violation events to local subscribers over a TCP or Unix
+    socket as newline-delimited JSON
+
+    Every event carries an increasing offset (the violation ID). A subscriber
+    sends the offset it wants to resume from and first receives the retained
+    events from that offset on, then live events as they are published.
+    Idle subscribers get a heartbeat line every HEARTBEAT_INTERVAL seconds.
+    """
+    def __init__(self, address='127.0.0.1:50056', history=1000):
+        """
+        Start the publisher
+
+        Args:
+            address: 'host:port' for localhost TCP, or a Unix socket path
+            history: Number of recent events kept for resuming subscribers
+        """
+        self.address = parse_address(address)
+        self.history = deque(maxlen=history)  # (offset, encoded line), oldest first
+        self.condition = threading.Condition()
+        self.closed = False
+
+        publisher = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                publisher._serve_subscriber(self.rfile, self.wfile)
+
+        if isinstance(self.address, tuple):
+            self.server = _TCPServer(self.address, Handler)
+        else:
+            _remove_stale_socket(self.address)
+            self.server = _UnixServer(self.address, Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name='event-feed', daemon=True)
+        self.thread.start()
+
+    def publish(self, offset, event):
+        """
+        Send an event to all subscribers
+
+        Args:
+            offset: Event offset, increasing across calls (the violation ID)
+            event: JSON-serializable dictionary
+        """
+        line = (json.dumps({'offset': offset, 'event': event}, default=str) + '\n').encode()
+        with self.condition:
+            self.history.append((offset, line))
+            self.condition.notify_all()
+
+    def _pending(self, next_offset):
+        """Retained lines with offsets >= next_offset, oldest first (call with the condition held)"""
+        pending = []
+        for offset, line in reversed(self.history):
+            if offset < next_offset:
+                break
+            pending.append((offset, line))
+        pending.reverse()
+        return pending
+
+    def _serve_subscriber(self, rfile, wfile):
+        try:
+            cursor = json.loads(rfile.readline() or b'{}')
+            next_offset = int(cursor.get('offset', 0))
+        except ValueError:
+            return
+
+        while True:
+            with self.condition:
+                pending = self._pending(next_offset)
+                if not pending and not self.closed:
+                    self.condition.wait(timeout=HEARTBEAT_INTERVAL)
+                    pending = self._pending(next_offset)
+                if self.closed:
+                    return
+            try:
+                wfile.write(b''.join(line for _, line in pending) if pending else HEARTBEAT_LINE)
+                wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            if pending:
+                next_offset = pending[-1][0] + 1
+
+    def close(self):
+        """Disconnect subscribers and stop listening"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+        if not isinstance(self.address, tuple) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+def subscribe(address='127.0.0.1:50056', offset=0, timeout=5.0):
+    """
+    Subscribe to a publisher's events
+
+    Args:
+        address: 'host:port' or Unix socket path of the publisher
+        offset: First event offset wanted (e.g. last seen violation ID + 1)
+        timeout: Seconds to wait when connecting, and for any line (event or
+                 heartbeat) once subscribed; socket.timeout is raised if the
+                 publisher goes silent
+
+    Yields:
+        (offset, event dictionary) in offset order until the connection
+        closes, and (None, None) for each heartbeat so callers can re-check
+        their own state while no events arrive
+    """
+    address = parse_address(address)
+    if isinstance(address, tuple):
+        sock = socket.create_connection(address, timeout=timeout)
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address)
+    sock.settimeout(max(timeout, 3 * HEARTBEAT_INTERVAL))  # Heartbeats keep an idle feed alive
+
+    with sock, sock.makefile('rb') as stream:
+        sock.sendall((json.dumps({'offset': offset}) + '\n').encode())
+        for line in stream:
+            message = json.loads(line)
+            if message.get('heartbeat'):
+                yield None, None
+                continue
+            yield message['offset'], message['event']
\ No newline at end of file
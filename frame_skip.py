@@ -0,0 +1,85 @@
+import time
+import cv2
+import numpy as np
+
+class FrameSkipController:
+    """
+    Decides on which frames to run the detector, skipping frames in between
+    while adapting the detection interval to the measured processing rate
+    """
+    def __init__(self, min_interval=1, max_interval=4, motion_threshold=8.0, target_fps=30):
+        """
+        Initialize the frame skip controller
+
+        Args:
+            min_interval: Smallest number of frames between detections
+            max_interval: Largest number of frames between detections
+            motion_threshold: Mean absolute grey-level change (0-255) since the
+                              last detection that forces a new detection
+            target_fps: Frame rate the system has to keep up with
+        """
+        self.min_interval = max(1, int(min_interval))
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.motion_threshold = motion_threshold
+        self.target_fps = target_fps
+        self.interval = self.min_interval
+        self.last_detection_frame = None
+        self.reference = None  # Downscaled grey frame from the last detection
+        self.last_call = None
+        self.frame_time = None  # Smoothed seconds per processed frame
+
+    def set_fps(self, fps):
+        """Set the frame rate the system has to keep up with"""
+        self.target_fps = fps if fps > 0 else 30
+
+    @staticmethod
+    def _thumbnail(frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, (64, 36), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _update_rate(self):
+        now = time.perf_counter()
+        if self.last_call is not None:
+            elapsed = now - self.last_call
+            self.frame_time = elapsed if self.frame_time is None else 0.9 * self.frame_time + 0.1 * elapsed
+        self.last_call = now
+
+    def _adapt_interval(self):
+        if not self.frame_time:
+            return
+        processing_fps = 1.0 / self.frame_time
+        if processing_fps < self.target_fps * 0.95 and self.interval < self.max_interval:
+            # Falling behind real time: detect less often
+            self.interval += 1
+        elif processing_fps > self.target_fps * 1.5 and self.interval > self.min_interval:
+            # Plenty of headroom: detect more often
+            self.interval -= 1
+
+    def should_detect(self, frame, frame_number):
+        """
+        Decide whether to run the detector on this frame
+
+        Args:
+            frame: OpenCV image (numpy array)
+            frame_number: Current frame number
+
+        Returns:
+            True if the detector should run, False to use tracker predictions
+        """
+        self._update_rate()
+
+        thumbnail = None
+        detect = (self.last_detection_frame is None
+                  or frame_number - self.last_detection_frame >= self.interval)
+
+        if not detect and self.motion_threshold is not None:
+            thumbnail = self._thumbnail(frame)
+            motion = np.abs(thumbnail - self.reference).mean()
+            detect = motion > self.motion_threshold
+
+        if detect:
+            self._adapt_interval()
+            self.last_detection_frame = frame_number
+            self.reference = thumbnail if thumbnail is not None else self._thumbnail(frame)
+
+        return detect
\ No newline at end of file
@@ -1,25 +1,233 @@
 import cv2
 import numpy as np
-import easyocr
 import re
+import heapq
+import threading
+from collections import OrderedDict, defaultdict
+
+def find_plate_box(vehicle_img, min_width=60, min_height=20):
+    """
+    Find the bounding box of the most likely license plate region using
+    edge detection and rectangular contours
+    
+    Args:
+        vehicle_img: Image of the vehicle
+        min_width: Minimum plate candidate width
+        min_height: Minimum plate candidate height
+        
+    Returns:
+        (x, y, w, h) of the plate candidate or None
+    """
+    if vehicle_img is None or vehicle_img.size == 0:
+        return None
+    
+    # Convert to grayscale
+    gray = cv2.cvtColor(vehicle_img, cv2.COLOR_BGR2GRAY)
+    
+    # Apply filters to enhance edges
+    gray = cv2.bilateralFilter(gray, 11, 17, 17)
+    edged = cv2.Canny(gray, 30, 200)
+    
+    # Find contours
+    contours, _ = cv2.findContours(edged.copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    contours = sorted(contours, key=cv2.contourArea, reverse=True)[:10]
+    
+    # Iterate through contours to find license plate candidates
+    for c in contours:
+        peri = cv2.arcLength(c, True)
+        approx = cv2.approxPolyDP(c, 0.02 * peri, True)
+        
+        # License plates typically have 4 corners (rectangle)
+        if len(approx) == 4:
+            x, y, w, h = cv2.boundingRect(c)
+            
+            # Check minimum size to avoid small noise
+            if w < min_width or h < min_height:
+                continue
+                
+            # Calculate aspect ratio (width/height)
+            plate_aspect_ratio = w / float(h)
+            
+            # Typical license plate aspect ratios
+            if 1.5 <= plate_aspect_ratio <= 5.0:
+                return x, y, w, h
+    
+    return None
+
+def find_plate_box_fast(vehicle_img, min_width=60, min_height=20, search_band=(0.4, 1.0), max_width=320):
+    """
+    Faster variant of find_plate_box: searches only a horizontal band of the
+    vehicle, downscales wide crops before filtering, keeps only outer
+    contours and avoids copying the image
+    
+    Args:
+        vehicle_img: Image of the vehicle
+        min_width: Minimum plate candidate width
+        min_height: Minimum plate candidate height
+        search_band: (top, bottom) fractions of the crop height to search
+        max_width: Crops wider than this are downscaled before filtering
+        
+    Returns:
+        (x, y, w, h) of the plate candidate in vehicle_img coordinates or None
+    """
+    if vehicle_img is None or vehicle_img.size == 0:
+        return None
+    
+    # Plates sit in the lower part of the vehicle; slicing is a view, not a copy
+    height = vehicle_img.shape[0]
+    top = int(height * search_band[0])
+    band = vehicle_img[top:int(height * search_band[1])]
+    if band.size == 0:
+        return None
+    
+    gray = cv2.cvtColor(band, cv2.COLOR_BGR2GRAY)
+    scale = min(1.0, max_width / gray.shape[1])
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
+    gray = cv2.bilateralFilter(gray, 5, 17, 17)
+    edged = cv2.Canny(gray, 30, 200)
+    
+    contours, _ = cv2.findContours(edged, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    for c in heapq.nlargest(10, contours, key=cv2.contourArea):
+        peri = cv2.arcLength(c, True)
+        approx = cv2.approxPolyDP(c, 0.02 * peri, True)
+        if len(approx) != 4:
+            continue
+        
+        x, y, w, h = cv2.boundingRect(c)
+        if w < min_width * scale or h < min_height * scale:
+            continue
+        if 1.5 <= w / float(h) <= 5.0:
+            return (int(x / scale), int(y / scale) + top, int(w / scale), int(h / scale))
+    
+    return None
+
+class PlateLocator:
+    """
+    Finds the license plate box in a vehicle crop with a selectable method:
+    'contour' (the original edge/contour search), 'fast' (banded, downscaled
+    contour search) or 'model' (a lightweight plate detection model)
+    """
+    def __init__(self, min_plate_size=(60, 20), method='contour', search_band=(0.4, 1.0),
+                 max_width=320, detector=None):
+        """
+        Initialize the locator
+        
+        Args:
+            min_plate_size: Minimum width and height for license plate candidates
+            method: 'contour', 'fast' or 'model'
+            search_band: (top, bottom) fractions of the crop height searched in fast mode
+            max_width: Crops wider than this are downscaled in fast mode
+            detector: For the 'model' method, a dictionary with 'backend'
+                      ('ultralytics' or 'onnxruntime'), 'model' (weights path),
+                      'confidence_threshold' and backend 'options'
+        """
+        self.min_width, self.min_height = min_plate_size
+        self.method = method
+        self.search_band = tuple(search_band)
+        self.max_width = max_width
+        self.detector = None
+        
+        if method == 'model':
+            from models.detector_backends import create_backend
+            detector = detector or {}
+            options = dict(detector.get('options') or {}, model=detector.get('model', 'plate_detector.onnx'))
+            self.detector = create_backend(
+                detector.get('backend', 'onnxruntime'),
+                model_name=detector.get('model', 'plate_detector.onnx'),
+                confidence_threshold=detector.get('confidence_threshold', 0.4),
+                options=options if detector.get('backend', 'onnxruntime') == 'onnxruntime' else None
+            )
+        elif method not in ('contour', 'fast'):
+            raise ValueError(f"Unknown plate localization method: {method}")
+    
+    @classmethod
+    def from_config(cls, min_plate_size, config):
+        """
+        Create a locator from the license_plate.localization config section
+        
+        Args:
+            min_plate_size: Minimum width and height for license plate candidates
+            config: Localization config dictionary, or None for the contour method
+        """
+        config = config or {}
+        return cls(
+            min_plate_size=min_plate_size,
+            method=config.get('method', 'contour'),
+            search_band=config.get('search_band', (0.4, 1.0)),
+            max_width=config.get('max_width', 320),
+            detector=config.get('detector')
+        )
+    
+    def find(self, vehicle_img):
+        """
+        Find the license plate box in a vehicle image
+        
+        Returns:
+            (x, y, w, h) of the plate candidate or None
+        """
+        if self.method == 'fast':
+            return find_plate_box_fast(vehicle_img, self.min_width, self.min_height,
+                                       self.search_band, self.max_width)
+        if self.method == 'model':
+            return self._find_with_model(vehicle_img)
+        return find_plate_box(vehicle_img, self.min_width, self.min_height)
+    
+    def _find_with_model(self, vehicle_img):
+        if vehicle_img is None or vehicle_img.size == 0:
+            return None
+        boxes = self.detector.predict([vehicle_img])[0]
+        
+        # Most confident box that meets the minimum plate size
+        height, width = vehicle_img.shape[:2]
+        for x1, y1, x2, y2, _, _ in boxes[np.argsort(-boxes[:, 4])]:
+            x1, y1 = max(0, int(x1)), max(0, int(y1))
+            x2, y2 = min(width, int(x2)), min(height, int(y2))
+            if x2 - x1 >= self.min_width and y2 - y1 >= self.min_height:
+                return x1, y1, x2 - x1, y2 - y1
+        return None
 
 class LicensePlateRecognizer:
     """
     Detects and recognizes license plates on vehicles
     """
-    def __init__(self, min_confidence=0.5, min_plate_size=(60, 20)):
+    def __init__(self, min_confidence=0.5, min_plate_size=(60, 20), localization=None):
         """
         Initialize the license plate recognizer
         
         Args:
             min_confidence: Minimum confidence for OCR results
             min_plate_size: Minimum width and height for license plate candidates
+            localization: license_plate.localization config selecting how plates
+                          are found in the vehicle crop (default: contour search)
         """
-        print("Initializing EasyOCR license plate reader...")
-        self.reader = easyocr.Reader(['en'])  # Initialize EasyOCR with English
         self.min_confidence = min_confidence
         self.min_width, self.min_height = min_plate_size
-        print("License plate reader initialized")
+        self.locator = PlateLocator.from_config(min_plate_size, localization)
+        self._reader = None  # EasyOCR reader, loaded on first use or by warm_up()
+        self._reader_lock = threading.Lock()
+        # Serializes EasyOCR calls, so the background warm-up never runs
+        # concurrently with a real read (the reader is not thread-safe)
+        self._ocr_lock = threading.Lock()
+    
+    @property
+    def reader(self):
+        """EasyOCR reader, loaded on first access (concurrent callers wait for one load)"""
+        if self._reader is None:
+            with self._reader_lock:
+                if self._reader is None:
+                    import easyocr
+                    print("Initializing EasyOCR license plate reader...")
+                    self._reader = easyocr.Reader(['en'])  # Initialize EasyOCR with English
+                    print("License plate reader initialized")
+        return self._reader
+    
+    def warm_up(self):
+        """Load the EasyOCR reader and run it once so the first real read is fast"""
+        reader = self.reader
+        with self._ocr_lock:
+            reader.recognize(np.full((32, 96), 255, dtype=np.uint8), horizontal_list=[[0, 96, 0, 32]], free_list=[])
     
     def find_license_plate_area(self, vehicle_img):
         """
@@ -31,47 +239,25 @@ class LicensePlateRecognizer:
         Returns:
             Image of potential license plate or None
         """
-        if vehicle_img is None or vehicle_img.size == 0:
+        box = self.find_license_plate_box(vehicle_img)
+        if box is None:
             return None
-            
-        # Make a copy to avoid modifying the original
-        img = vehicle_img.copy()
         
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Apply filters to enhance edges
-        gray = cv2.bilateralFilter(gray, 11, 17, 17)
-        edged = cv2.Canny(gray, 30, 200)
-        
-        # Find contours
-        contours, _ = cv2.findContours(edged.copy(), cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)[:10]
-        
-        plate_img = None
+        # Copy to avoid handing out a view of the original
+        x, y, w, h = box
+        return vehicle_img[y:y+h, x:x+w].copy()
+    
+    def find_license_plate_box(self, vehicle_img):
+        """
+        Find the bounding box of the most likely license plate region
         
-        # Iterate through contours to find license plate candidates
-        for c in contours:
-            peri = cv2.arcLength(c, True)
-            approx = cv2.approxPolyDP(c, 0.02 * peri, True)
+        Args:
+            vehicle_img: Image of the vehicle
             
-            # License plates typically have 4 corners (rectangle)
-            if len(approx) == 4:
-                x, y, w, h = cv2.boundingRect(c)
-                
-                # Check minimum size to avoid small noise
-                if w < self.min_width or h < self.min_height:
-                    continue
-                    
-                # Calculate aspect ratio (width/height)
-                plate_aspect_ratio = w / float(h)
-                
-                # Typical license plate aspect ratios
-                if 1.5 <= plate_aspect_ratio <= 5.0:
-                    plate_img = img[y:y+h, x:x+w]
-                    break
-        
-        return plate_img
+        Returns:
+            (x, y, w, h) of the plate candidate or None
+        """
+        return self.locator.find(vehicle_img)
     
     def clean_plate_text(self, text):
         """
@@ -108,12 +294,26 @@ class LicensePlateRecognizer:
         Returns:
             Recognized text or None
         """
+        return self.recognize_text_with_confidence(img)[0]
+    
+    def recognize_text_with_confidence(self, img):
+        """
+        Recognize text in an image using EasyOCR
+        
+        Args:
+            img: Image containing text
+            
+        Returns:
+            Tuple of (recognized text or None, mean OCR confidence)
+        """
         if img is None:
-            return None
+            return None, 0.0
             
         try:
             # Use EasyOCR to recognize text
-            results = self.reader.readtext(img)
+            reader = self.reader
+            with self._ocr_lock:
+                results = reader.readtext(img)
             
             # Filter results by confidence
             high_conf_results = [res for res in results if res[2] > self.min_confidence]
@@ -121,11 +321,84 @@ class LicensePlateRecognizer:
             if high_conf_results:
                 # Join all detected text
                 plate_text = ' '.join([res[1] for res in high_conf_results])
-                return self.clean_plate_text(plate_text)
-            return None
+                confidence = sum(res[2] for res in high_conf_results) / len(high_conf_results)
+                return self.clean_plate_text(plate_text), float(confidence)
+            return None, 0.0
         except Exception as e:
             print(f"Error in OCR: {e}")
-            return None
+            return None, 0.0
+    
+    def recognize_batch(self, plate_imgs, line_height=None):
+        """
+        Recognize text in several plate crops with one batched forward pass of
+        EasyOCR's recognizer, skipping its text detector
+        
+        Reader.recognize() loops over boxes one at a time on CPU, so the crops
+        are handed straight to easyocr's get_text(), which batches them through
+        the recognition network.
+        
+        Args:
+            plate_imgs: List of plate images (entries may be None)
+            line_height: Height each crop is scaled to; defaults to the input
+                         height of the loaded recognition model
+            
+        Returns:
+            List of (cleaned text or None, confidence) aligned with plate_imgs
+        """
+        from easyocr.recognition import get_text
+        
+        results = [(None, 0.0)] * len(plate_imgs)
+        valid = [i for i, img in enumerate(plate_imgs) if img is not None and img.size > 0]
+        if not valid:
+            return results
+        
+        try:
+            reader = self.reader
+        except Exception as e:
+            print(f"Error in OCR: {e}")
+            return results
+        if line_height is None:
+            line_height = self._recognizer_height(reader)
+        
+        # (index, grayscale crop at the recognizer height) pairs; get_text returns the index as the box
+        image_list = []
+        max_ratio = 1.0
+        for i in valid:
+            img = plate_imgs[i]
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+            ratio = gray.shape[1] / gray.shape[0]
+            max_ratio = max(max_ratio, ratio)
+            width = max(1, int(round(line_height * ratio)))
+            image_list.append((i, cv2.resize(gray, (width, line_height), interpolation=cv2.INTER_LANCZOS4)))
+        
+        try:
+            ignore_char = ''.join(set(reader.character) - set(reader.lang_char))
+            with self._ocr_lock:
+                readings = get_text(reader.character, line_height, int(np.ceil(max_ratio) * line_height),
+                                    reader.recognizer, reader.converter, image_list, ignore_char,
+                                    batch_size=len(image_list), workers=0, device=reader.device)
+        except Exception as e:
+            print(f"Error in OCR: {e}")
+            return results
+        
+        for i, text, confidence in readings:
+            if confidence > self.min_confidence:
+                results[i] = (self.clean_plate_text(text), float(confidence))
+        return results
+    
+    @staticmethod
+    def _recognizer_height(reader):
+        """
+        Input height of the reader's recognition model
+        
+        Reader.readtext() passes easyocr's imgH to get_text(); it is 64 for the
+        bundled models and replaced by the model's yaml for custom ones.
+        """
+        height = getattr(reader, 'imgH', None)
+        if height is None:
+            from easyocr import easyocr as easyocr_module
+            height = getattr(easyocr_module, 'imgH', 64)
+        return int(height)
     
     def process_vehicle(self, vehicle_img):
         """
@@ -137,8 +410,270 @@ class LicensePlateRecognizer:
         Returns:
             License plate text or None
         """
+        return self.read_plate(vehicle_img)[0]
+    
+    def read_plate(self, vehicle_img):
+        """
+        Extract the license plate from a vehicle image along with the OCR confidence
+        
+        Args:
+            vehicle_img: Image of the vehicle
+            
+        Returns:
+            Tuple of (license plate text or None, OCR confidence)
+        """
         plate_img = self.find_license_plate_area(vehicle_img)
         if plate_img is not None:
-            plate_text = self.recognize_text(plate_img)
-            return plate_text
-        return None
\ No newline at end of file
+            return self.recognize_text_with_confidence(plate_img)
+        return None, 0.0
+    
+    def read_plates(self, vehicle_imgs):
+        """
+        Extract license plates from several vehicle images with one batched
+        recognizer call
+        
+        Args:
+            vehicle_imgs: List of vehicle images
+            
+        Returns:
+            List of (license plate text or None, OCR confidence) aligned with vehicle_imgs
+        """
+        return self.recognize_batch([self.find_license_plate_area(img) for img in vehicle_imgs])
+
+class PlateReadCache:
+    """
+    Accumulates OCR reads per track and settles on a plate by
+    confidence-weighted character voting, so OCR stops once reads agree
+    """
+    def __init__(self, max_reads=5, consensus_votes=2):
+        """
+        Initialize the cache
+        
+        Args:
+            max_reads: Maximum OCR attempts per track
+            consensus_votes: Number of identical reads that settle the plate early
+        """
+        self.max_reads = max_reads
+        self.consensus_votes = consensus_votes
+        self.entries = OrderedDict()  # Track ID -> entry, least recently seen first
+    
+    @staticmethod
+    def vote(reads):
+        """
+        Combine reads by confidence-weighted character voting
+        
+        Args:
+            reads: List of (text, confidence) tuples
+            
+        Returns:
+            Tuple of (voted text or None, number of reads equal to it)
+        """
+        if not reads:
+            return None, 0
+        
+        # Most plausible plate length, then the best character at each position
+        length_scores = defaultdict(float)
+        for text, confidence in reads:
+            length_scores[len(text)] += confidence
+        length = max(length_scores, key=length_scores.get)
+        
+        characters = []
+        for i in range(length):
+            char_scores = defaultdict(float)
+            for text, confidence in reads:
+                if len(text) == length:
+                    char_scores[text[i]] += confidence
+            characters.append(max(char_scores, key=char_scores.get))
+        
+        plate = ''.join(characters)
+        return plate, sum(1 for text, _ in reads if text == plate)
+    
+    def get(self, track_id):
+        """Get the cache entry of a track, or None"""
+        return self.entries.get(track_id)
+    
+    def touch(self, track_id, frame_number):
+        """
+        Mark a track as seen, creating its entry if needed
+        
+        Returns:
+            The track's entry
+        """
+        entry = self.entries.pop(track_id, None)
+        if entry is None:
+            entry = {'reads': [], 'attempts': 0, 'plate': None, 'settled': False,
+                     'recorded': False, 'best': None}
+        entry['last_frame'] = frame_number
+        self.entries[track_id] = entry  # Re-insert as most recently seen
+        return entry
+    
+    def add_read(self, track_id, text, confidence, frame_number, context=None):
+        """
+        Add an OCR attempt for a track
+        
+        Args:
+            track_id: Tracker object ID
+            text: Cleaned plate text, or None if nothing was read
+            confidence: OCR confidence of the read
+            frame_number: Frame the read came from
+            context: Optional data (e.g. crop and speed) kept for the most confident read
+            
+        Returns:
+            The track's entry; 'settled' is True once no more OCR is needed
+        """
+        entry = self.touch(track_id, frame_number)
+        entry['attempts'] += 1
+        
+        if text:
+            entry['reads'].append((text, confidence))
+            if entry['best'] is None or confidence > entry['best'][0]:
+                entry['best'] = (confidence, context)
+            entry['plate'], votes = self.vote(entry['reads'])
+            if votes >= self.consensus_votes:
+                entry['settled'] = True
+        
+        if entry['attempts'] >= self.max_reads:
+            entry['settled'] = True
+        return entry
+    
+    def expire(self, frame_number, max_age_frames):
+        """
+        Evict tracks not seen for more than max_age_frames
+        
+        Returns:
+            List of (track ID, entry) for evicted tracks
+        """
+        expired = []
+        while self.entries:
+            track_id, entry = next(iter(self.entries.items()))
+            if frame_number - entry['last_frame'] <= max_age_frames:
+                break
+            del self.entries[track_id]
+            expired.append((track_id, entry))
+        return expired
+
+class BestFrameSelector:
+    """
+    Keeps the single best vehicle crop per speeding track, scored with cheap
+    sharpness, plate candidate and size metrics, and releases it for one OCR pass once the
+    score has been stable for a while or the track disappears
+    """
+    def __init__(self, min_plate_size=(60, 20), stable_frames=10, max_crop_size=640, score_width=160, locator=None):
+        """
+        Initialize the selector
+        
+        Args:
+            min_plate_size: Minimum width and height for license plate candidates
+            stable_frames: Frames without a better candidate before OCR runs
+            max_crop_size: Longest side of stored crops; larger crops are downscaled
+            score_width: Crops are downscaled to this width before measuring sharpness
+            locator: PlateLocator used to find plate candidates (fast method by default)
+        """
+        self.locator = locator or PlateLocator(min_plate_size, method='fast')
+        self.score_width = score_width
+        self.stable_frames = stable_frames
+        self.max_crop_size = max_crop_size
+        self.entries = OrderedDict()  # Track ID -> entry, least recently seen first
+        self.retries = []  # (track ID, candidate) of expired tracks whose OCR couldn't be queued
+    
+    def score(self, vehicle_img):
+        """
+        Score how promising a vehicle crop is for OCR
+        
+        Runs on every speeding track every frame, so it only combines cheap
+        metrics: Laplacian variance (sharpness) of a downscaled copy, the
+        area of the plate candidate found by the locator and the crop size.
+        
+        Returns:
+            Score, higher is better
+        """
+        if vehicle_img is None or vehicle_img.size == 0:
+            return float('-inf')
+        height, width = vehicle_img.shape[:2]
+        small = vehicle_img
+        if width > self.score_width:
+            small = cv2.resize(vehicle_img, (self.score_width, max(1, height * self.score_width // width)),
+                               interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+        
+        box = self.locator.find(vehicle_img)
+        plate_area = box[2] * box[3] if box is not None else 0
+        
+        return np.log1p(sharpness) + np.log1p(plate_area) + 0.5 * np.log1p(height * width)
+    
+    def _bounded_copy(self, vehicle_img):
+        height, width = vehicle_img.shape[:2]
+        scale = self.max_crop_size / max(height, width)
+        if scale < 1:
+            return cv2.resize(vehicle_img, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        return vehicle_img.copy()
+    
+    def update(self, track_id, vehicle_img, speed, frame_number):
+        """
+        Offer a crop of a speeding track
+        
+        Args:
+            track_id: Tracker object ID
+            vehicle_img: Image of the vehicle (not retained; a bounded copy is kept if it is the best so far)
+            speed: Measured speed in km/h
+            frame_number: Current frame number
+            
+        Returns:
+            Candidate dictionary ('vehicle_img', 'speed', 'frame_number') when
+            it is time to run OCR for this track, otherwise None. The candidate
+            is offered again on later frames until mark_done() is called.
+        """
+        entry = self.entries.pop(track_id, None)
+        if entry is None:
+            entry = {'score': float('-inf'), 'candidate': None, 'stale': 0, 'done': False}
+        entry['last_frame'] = frame_number
+        self.entries[track_id] = entry  # Re-insert as most recently seen
+        
+        if entry['done']:
+            return None
+        
+        score = self.score(vehicle_img)
+        if score > entry['score']:
+            entry['score'] = score
+            entry['candidate'] = {
+                'vehicle_img': self._bounded_copy(vehicle_img),
+                'speed': speed,
+                'frame_number': frame_number
+            }
+            entry['stale'] = 0
+        else:
+            entry['stale'] += 1
+        
+        if entry['stale'] >= self.stable_frames:
+            return entry['candidate']
+        return None
+    
+    def mark_done(self, track_id):
+        """Stop offering a track's candidate once its OCR has been run or queued"""
+        entry = self.entries.get(track_id)
+        if entry is not None:
+            entry['done'] = True
+            entry['candidate'] = None  # Release the crop
+    
+    def retry_later(self, track_id, candidate):
+        """Keep an expired track's candidate whose OCR couldn't be queued; expire() returns it again"""
+        self.retries.append((track_id, candidate))
+    
+    def expire(self, frame_number, max_age_frames):
+        """
+        Evict tracks not seen for more than max_age_frames
+        
+        Returns:
+            List of (track ID, candidate) for evicted tracks that still need
+            OCR, including candidates passed to retry_later()
+        """
+        expired, self.retries = self.retries, []
+        while self.entries:
+            track_id, entry = next(iter(self.entries.items()))
+            if frame_number - entry['last_frame'] <= max_age_frames:
+                break
+            del self.entries[track_id]
+            if not entry['done'] and entry['candidate'] is not None:
+                expired.append((track_id, entry['candidate']))
+        return expired
\ No newline at end of file
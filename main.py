@@ -3,21 +3,30 @@ import time
 import argparse
 import os
 import yaml
+import threading
 from datetime import datetime
 
 # Import our modules
-from models.detector import VehicleDetector
+from models.detector import VehicleDetector, RegionOfInterest
 from models.tracker import ObjectTracker
 from models.speed_estimator import SpeedEstimator
-from models.license_plate_recognizer import LicensePlateRecognizer
+from models.speed_trap import SpeedTrap
+from models.license_plate_recognizer import LicensePlateRecognizer, PlateReadCache, BestFrameSelector, PlateLocator
+from models.ocr_service import OCRService
+from models.model_server import RemoteRecognizer
+from models.frame_skip import FrameSkipController
+from models.calibration import GroundPlaneLookup
 from utils.database import ViolationDatabase
 from utils.notification import NotificationSystem
+from utils.event_feed import EventPublisher
+from utils.pipeline import Pipeline
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Vehicle Detection and Speed Enforcement System')
     parser.add_argument('--config', type=str, default='config.yaml', help='Path to configuration file')
     parser.add_argument('--input', type=str, help='Override input source from config')
     parser.add_argument('--speed_limit', type=float, help='Override speed limit from config')
+    parser.add_argument('--pipeline', action='store_true', help='Run capture, detection, OCR and display as concurrent stages')
     return parser.parse_args()
 
 def load_config(config_path):
@@ -28,124 +37,670 @@ class VehicleDetectionSystem:
     def __init__(self, config):
         self.config = config
         
+        # Seconds spent per startup component; models load lazily and are
+        # warmed up in the background by warm_up_models()
+        self.startup_times = {}
+        step_start = time.perf_counter()
+        
         # Initialize detector with YOLOv8n
         self.detector = VehicleDetector(
             model_name=config['detection']['model'],
             confidence_threshold=config['detection']['confidence_threshold'],
-            classes=config['detection']['classes']
+            classes=config['detection']['classes'],
+            batch_size=config['detection'].get('batch_size', 1),
+            roi=RegionOfInterest.from_config(config['detection'].get('roi')),
+            backend=config['detection'].get('backend', 'ultralytics'),
+            backend_options=config['detection'].get('onnx')
         )
+        step_start = self._startup_step('detector', step_start)
+        
+        # Initialize frame skipping (detect every N frames, predict in between)
+        frame_skip_config = config['detection'].get('frame_skip', {})
+        if frame_skip_config.get('enabled', False):
+            self.frame_skip = FrameSkipController(
+                min_interval=frame_skip_config.get('min_interval', 1),
+                max_interval=frame_skip_config.get('max_interval', 4),
+                motion_threshold=frame_skip_config.get('motion_threshold', 8.0),
+                target_fps=config['system']['fps']
+            )
+        else:
+            self.frame_skip = None
         
         # Initialize tracker
-        self.tracker = ObjectTracker()
+        self.tracker = ObjectTracker(max_age_frames=config['speed']['max_tracking_age'])
+        
+        # Load the per-camera pixel-to-metre lookup grid written by calibrate.py
+        homography_config = config['speed'].get('homography', {})
+        ground_lookup = None
+        if homography_config.get('enabled', False):
+            ground_lookup = GroundPlaneLookup.load(homography_config['grid_file'], homography_config.get('grid_step', 4))
         
         # Initialize speed estimator
         self.speed_estimator = SpeedEstimator(
             distance_calibration=config['speed']['distance_calibration'],
-            max_age_frames=config['speed']['max_tracking_age']
+            max_age_frames=config['speed']['max_tracking_age'],
+            history_size=config['speed'].get('history_size', 32),
+            smoothing_window=config['speed'].get('smoothing_window', 5),
+            ground_lookup=ground_lookup
         )
+        self.use_tracker_velocity = config['speed'].get('use_tracker_velocity', True)
+        
+        # Speed trap mode times each vehicle between lines instead of
+        # differentiating its position every frame
+        if config['speed'].get('mode', 'tracking') == 'trap':
+            self.speed_trap = SpeedTrap(config['speed']['trap_lines'], config['speed']['max_tracking_age'])
+        else:
+            self.speed_trap = None
+        
+        step_start = self._startup_step('tracking', step_start)
         
-        # Initialize license plate recognizer
-        self.license_recognizer = LicensePlateRecognizer(
-            min_confidence=config['license_plate']['min_confidence'],
-            min_plate_size=config['license_plate']['min_plate_size']
+        # Initialize license plate recognizer, either in-process, as a
+        # worker pool fed asynchronously from the frame loop, or as a client
+        # of a model server shared with other camera processes
+        async_ocr_config = config['license_plate'].get('async_ocr', {})
+        model_server_config = config['license_plate'].get('model_server', {})
+        if model_server_config.get('enabled', False):
+            self.license_recognizer = RemoteRecognizer(
+                authkey=model_server_config.get('authkey'),
+                address=model_server_config.get('address', '127.0.0.1:50055')
+            )
+            self.ocr_service = None
+        elif async_ocr_config.get('enabled', False):
+            self.license_recognizer = None
+            self.ocr_service = OCRService(
+                workers=async_ocr_config.get('workers', 2),
+                max_pending=async_ocr_config.get('max_pending', 8),
+                min_confidence=config['license_plate']['min_confidence'],
+                min_plate_size=config['license_plate']['min_plate_size'],
+                localization=config['license_plate'].get('localization')
+            )
+        else:
+            self.license_recognizer = LicensePlateRecognizer(
+                min_confidence=config['license_plate']['min_confidence'],
+                min_plate_size=config['license_plate']['min_plate_size'],
+                localization=config['license_plate'].get('localization')
+            )
+            self.ocr_service = None
+        self.pending_ocr = set()  # Track IDs with an OCR job in flight
+        
+        # Per-track plate reads, voted until they agree
+        self.plate_cache = PlateReadCache(
+            max_reads=config['license_plate'].get('max_reads', 5),
+            consensus_votes=config['license_plate'].get('consensus_votes', 2)
         )
         
+        # Alternatively keep only the sharpest crop per track and OCR it once
+        if config['license_plate'].get('selection', 'vote') == 'best_frame':
+            # Score plate candidates with the configured locator unless it is
+            # the full contour search, which is too slow to run every frame
+            locator = getattr(self.license_recognizer, 'locator', None)
+            if locator is None or locator.method == 'contour':
+                locator = PlateLocator.from_config(
+                    config['license_plate']['min_plate_size'],
+                    dict(config['license_plate'].get('localization') or {}, method='fast')
+                )
+            self.frame_selector = BestFrameSelector(
+                min_plate_size=config['license_plate']['min_plate_size'],
+                stable_frames=config['license_plate'].get('stable_frames', 10),
+                max_crop_size=config['license_plate'].get('max_crop_size', 640),
+                locator=locator
+            )
+        else:
+            self.frame_selector = None
+        step_start = self._startup_step('ocr', step_start)
+        
         # Initialize database
-        self.db = ViolationDatabase(config['database']['path'])
+        self.db = ViolationDatabase(
+            config['database']['path'],
+            batch_size=config['database'].get('write_batch_size', 32),
+            max_delay=config['database'].get('write_max_delay_ms', 500) / 1000.0
+        )
+        step_start = self._startup_step('database', step_start)
         
         # Initialize notification system
         if config['notification']['enabled']:
-            self.notification = NotificationSystem(config['notification'])
+            notification_config = config['notification']
+            self.notification = NotificationSystem(
+                notification_config,
+                queue_size=notification_config.get('queue_size', 100),
+                digest_interval=notification_config.get('digest_seconds', 0),
+                max_retries=notification_config.get('max_retries', 3),
+                retry_backoff=notification_config.get('retry_backoff', 1.0)
+            )
         else:
             self.notification = None
         
+        # Publish violation events to subscribed dashboards
+        events_config = config.get('events', {})
+        self.event_feed = None
+        if events_config.get('enabled', False):
+            try:
+                self.event_feed = EventPublisher(
+                    address=events_config.get('address', '127.0.0.1:50056'),
+                    history=events_config.get('history', 1000)
+                )
+            except OSError as e:
+                # e.g. another camera process already owns the address
+                print(f"Warning: event feed disabled, could not listen on {events_config.get('address')}: {e}")
+        self._startup_step('notification', step_start)
+        
         # Create output directories
         os.makedirs(config['system']['output_dir'], exist_ok=True)
         os.makedirs(os.path.join(config['system']['output_dir'], 'violations'), exist_ok=True)
         
         # Track violations to prevent duplicates
         self.violation_cooldown = {}
+        self.warm_up_thread = None
+    
+    def _startup_step(self, name, start):
+        """Record the time since start for a startup component and return the current time"""
+        now = time.perf_counter()
+        self.startup_times[name] = self.startup_times.get(name, 0.0) + now - start
+        return now
+    
+    def warm_up_models(self, frame_size=(640, 640)):
+        """
+        Load and warm up the detection and OCR models in a background thread
+        while capture starts; the first frame waits only for what is still loading
         
-    def process_frame(self, frame, frame_number):
-        # Detect vehicles
-        detections = self.detector.detect(frame)
+        Args:
+            frame_size: (width, height) of the frames the detector will see
+        """
+        def warm_up():
+            start = time.perf_counter()
+            self.detector.warm_up(frame_size)
+            start = self._startup_step('detector warm-up', start)
+            if self.license_recognizer is not None:
+                self.license_recognizer.warm_up()
+                self._startup_step('ocr warm-up', start)
+            elif self.ocr_service is not None:
+                self.ocr_service.warm_up()
+                self._startup_step('ocr workers warm-up', start)
+            self.print_startup_report()
+        
+        self.warm_up_thread = threading.Thread(target=warm_up, name='model-warm-up', daemon=True)
+        self.warm_up_thread.start()
+    
+    def print_startup_report(self):
+        """Print the startup time per component"""
+        print("Startup time by component:")
+        for name, seconds in self.startup_times.items():
+            print(f"  {name:18s} {seconds * 1000:8.1f} ms")
+        print(f"  {'total':18s} {sum(self.startup_times.values()) * 1000:8.1f} ms")
+        
+    def track_frame(self, frame, frame_number, detections=None, skip=None):
+        """
+        Detect and track vehicles in a frame and estimate their speeds
+        
+        Args:
+            frame: OpenCV image (numpy array)
+            frame_number: Current frame number
+            detections: Precomputed detections for the frame (e.g. from
+                        VehicleDetector.detect_batch); detected here if None
+            skip: Frame-skip decision already made by the caller (True to
+                  use tracker predictions); decided here if None
+            
+        Returns:
+            List of (object ID, detection dictionary, speed in km/h) tuples
+        """
+        # On skipped frames the tracker predicts boxes and speeds are carried
+        # over, so the speed estimator only sees measured positions
+        if skip is None:
+            skip = (detections is None and self.frame_skip is not None
+                    and not self.frame_skip.should_detect(frame, frame_number))
         
-        # Update tracker with new detections
-        tracked_objects = self.tracker.update(detections)
+        if skip:
+            tracked_objects = self.tracker.predict(frame_number)
+        else:
+            # Detect vehicles
+            if detections is None:
+                detections = self.detector.detect(frame)
+            
+            # Update tracker with new detections
+            tracked_objects = self.tracker.update(detections, frame_number)
         
-        # Process each tracked object
-        for obj_id, detection in tracked_objects.items():
+        obj_ids = list(tracked_objects.keys())
+        
+        # Calculate speeds
+        if self.speed_trap is not None:
+            speeds = self.speed_trap.update_frame(
+                obj_ids, [tracked_objects[obj_id]['bbox'] for obj_id in obj_ids], frame_number
+            ).tolist()
+        elif skip:
+            speeds = [self.speed_estimator.get_speed(obj_id) for obj_id in obj_ids]
+        else:
+            velocities = None
+            if self.use_tracker_velocity:
+                velocities = [tracked_objects[obj_id]['velocity'] for obj_id in obj_ids]
+            speeds = self.speed_estimator.update_frame(
+                obj_ids, [tracked_objects[obj_id]['bbox'] for obj_id in obj_ids], frame_number, velocities
+            ).tolist()
+        
+        # Copy so later tracker updates don't change what downstream stages see
+        tracked = [(obj_id, dict(tracked_objects[obj_id]), speed) for obj_id, speed in zip(obj_ids, speeds)]
+        
+        # Clean up old tracking objects
+        if self.speed_trap is not None:
+            self.speed_trap.cleanup_old_objects(frame_number)
+        else:
+            self.speed_estimator.cleanup_old_objects(frame_number)
+        
+        return tracked
+    
+    def check_violations(self, frame, frame_number, tracked):
+        """
+        Run license plate recognition for speeding vehicles and record violations
+        
+        Reads are accumulated per track and a violation is recorded once they
+        reach consensus (or the track disappears), after which the track is
+        not OCR'd again. With asynchronous OCR, speeding vehicles are queued
+        for the OCR workers and their reads are added as results come back.
+        
+        In best-frame mode only the best-scoring crop of each speeding track
+        is kept, and it is OCR'd once when its score stops improving or the
+        track disappears.
+        
+        Args:
+            frame: OpenCV image (numpy array)
+            frame_number: Current frame number
+            tracked: Output of track_frame for this frame
+            
+        Returns:
+            Dictionary mapping object IDs to recorded license plates
+        """
+        violations = self.collect_ocr_results()
+        speed_limit = self.config['speed']['limit_kmh']
+        candidates = []  # (obj_id, vehicle_img, speed) for in-process OCR
+        frame_height, frame_width = frame.shape[:2]
+        
+        for obj_id, detection, speed in tracked:
+            # Predicted and ROI-mapped boxes can leave the frame; negative
+            # slice indices would wrap around, so clip before cropping
             x1, y1, x2, y2 = detection['bbox']
-            confidence = detection['confidence']
-            class_id = detection['class_id']
+            x1, x2 = max(0, x1), min(frame_width, x2)
+            y1, y2 = max(0, y1), min(frame_height, y2)
+            
+            # Check for speed violation
+            if speed > speed_limit and speed < 200:  # Upper limit to filter outliers
+                if x2 <= x1 or y2 <= y1:
+                    continue  # Vehicle is outside the frame
+                
+                if self.frame_selector is not None:
+                    candidate = self.frame_selector.update(obj_id, frame[y1:y2, x1:x2], speed, frame_number)
+                    if candidate and self.read_candidate(obj_id, candidate, violations):
+                        self.frame_selector.mark_done(obj_id)
+                    continue
+                
+                # Skip OCR once the plate is settled or a read is already in flight
+                entry = self.plate_cache.touch(obj_id, frame_number)
+                if entry['settled'] or obj_id in self.pending_ocr:
+                    continue
+                
+                # Get vehicle image
+                vehicle_img = frame[y1:y2, x1:x2]
+                
+                if self.ocr_service is not None:
+                    # Hand the candidate to the OCR workers
+                    if self.ocr_service.submit(obj_id, vehicle_img, speed, frame_number):
+                        self.pending_ocr.add(obj_id)
+                    continue
+                
+                # Process license plate if speed is over the limit
+                candidates.append((obj_id, vehicle_img, speed))
+            elif self.plate_cache.get(obj_id) is not None:
+                self.plate_cache.touch(obj_id, frame_number)
+        
+        # Read all of this frame's plates in one batched recognizer call
+        if candidates:
+            reads = self.license_recognizer.read_plates([vehicle_img for _, vehicle_img, _ in candidates])
+            for (obj_id, vehicle_img, speed), (license_plate, confidence) in zip(candidates, reads):
+                plate = self.add_plate_read(obj_id, license_plate, confidence, vehicle_img, speed, frame_number)
+                if plate:
+                    violations[obj_id] = plate
+        
+        # Tracks that ended before their reads agreed are recorded with the voted plate
+        for obj_id, entry in self.plate_cache.expire(frame_number, self.config['speed']['max_tracking_age']):
+            if entry['plate'] and not entry['recorded']:
+                best = entry['best'][1]
+                self.record_violation(entry['plate'], best['speed'], best['vehicle_img'], best['frame_number'])
+        
+        # Tracks that ended before their best crop was read
+        if self.frame_selector is not None:
+            for obj_id, candidate in self.frame_selector.expire(frame_number, self.config['speed']['max_tracking_age']):
+                if not self.read_candidate(obj_id, candidate, violations):
+                    self.frame_selector.retry_later(obj_id, candidate)
+        
+        return violations
+    
+    def read_candidate(self, obj_id, candidate, violations=None):
+        """
+        Run OCR once on a track's best crop and record the violation
+        
+        Args:
+            obj_id: Tracker object ID
+            candidate: Candidate dictionary from BestFrameSelector
+            violations: Optional dictionary to add the recorded plate to
+                        (with asynchronous OCR the result is recorded when the job finishes)
+            
+        Returns:
+            True if OCR ran or was queued, False if the OCR queue was full and
+            the candidate must be offered again
+        """
+        if self.ocr_service is not None:
+            if not self.ocr_service.submit(obj_id, candidate['vehicle_img'], candidate['speed'], candidate['frame_number']):
+                print(f"OCR queue full, keeping best crop of track {obj_id} for a retry")
+                return False
+            self.pending_ocr.add(obj_id)
+            return True
+        
+        license_plate, _ = self.license_recognizer.read_plate(candidate['vehicle_img'])
+        if self.record_violation(license_plate, candidate['speed'], candidate['vehicle_img'], candidate['frame_number']):
+            if violations is not None:
+                violations[obj_id] = license_plate
+        return True
+    
+    def add_plate_read(self, obj_id, license_plate, confidence, vehicle_img, speed, frame_number):
+        """
+        Add an OCR read for a track and record the violation once reads agree
+        
+        Returns:
+            The recorded license plate, or None
+        """
+        context = {'vehicle_img': vehicle_img.copy(), 'speed': speed, 'frame_number': frame_number}
+        entry = self.plate_cache.add_read(obj_id, license_plate, confidence, frame_number, context)
+        
+        if entry['settled'] and entry['plate'] and not entry['recorded']:
+            entry['recorded'] = True
+            best = entry['best'][1]
+            if self.record_violation(entry['plate'], best['speed'], best['vehicle_img'], best['frame_number']):
+                return entry['plate']
+        return None
+    
+    def collect_ocr_results(self):
+        """
+        Add reads from OCR jobs that finished since the last call
+        
+        Returns:
+            Dictionary mapping object IDs to recorded license plates
+        """
+        violations = {}
+        if self.ocr_service is None:
+            return violations
+        
+        for job in self.ocr_service.poll_results():
+            self.pending_ocr.discard(job['track_id'])
+            if self.frame_selector is not None:
+                # A best-frame job is the track's only read
+                if self.record_violation(job['license_plate'], job['speed'], job['vehicle_img'], job['frame_number']):
+                    violations[job['track_id']] = job['license_plate']
+                continue
+            plate = self.add_plate_read(job['track_id'], job['license_plate'], job['confidence'],
+                                        job['vehicle_img'], job['speed'], job['frame_number'])
+            if plate:
+                violations[job['track_id']] = plate
+        return violations
+    
+    def record_violation(self, license_plate, speed, vehicle_img, frame_number):
+        """
+        Save, store and notify a violation unless the plate is in cooldown
+        
+        Args:
+            license_plate: Recognized license plate text (or None)
+            speed: Measured speed in km/h
+            vehicle_img: Image of the vehicle
+            frame_number: Frame the image was taken from
             
-            # Get vehicle image
-            vehicle_img = frame[y1:y2, x1:x2]
+        Returns:
+            True if a new violation was recorded
+        """
+        if not license_plate or len(license_plate) < 4:
+            return False
+        
+        speed_limit = self.config['speed']['limit_kmh']
+        
+        # Create a cooldown key (one violation per minute per plate)
+        cooldown_key = f"{license_plate}_{frame_number // (self.config['system']['fps'] * 60)}"
+        
+        if cooldown_key in self.violation_cooldown:
+            return False
+        self.violation_cooldown[cooldown_key] = True
+        
+        # Save violation image
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        violation_img_path = os.path.join(
+            self.config['system']['output_dir'], 
+            'violations', 
+            f"{license_plate}_{timestamp}.jpg"
+        )
+        cv2.imwrite(violation_img_path, vehicle_img)
+        
+        # Send notification if enabled
+        notified = False
+        if self.notification:
+            violation_data = {
+                'license_plate': license_plate,
+                'speed': speed,
+                'speed_limit': speed_limit,
+                'location': self.config['system']['location'],
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'image_path': violation_img_path
+            }
+            # Logged here; the email is queued for the dispatcher thread
+            notified = self.notification.send_violation_notification(violation_data)
+        
+        # Queue violation for the database writer thread
+        row_id = self.db.record_violation(
+            license_plate=license_plate,
+            speed=speed,
+            speed_limit=speed_limit,
+            location=self.config['system']['location'],
+            image_path=violation_img_path
+        )
+        
+        # Publish once committed, with the row ID as the event offset
+        if self.event_feed:
+            event = {
+                'id': None,
+                'license_plate': license_plate,
+                'speed': speed,
+                'speed_limit': speed_limit,
+                'location': self.config['system']['location'],
+                'timestamp': datetime.now().isoformat(),
+                'image_path': violation_img_path,
+                'notified': notified  # Written to notifications.log by NotificationSystem
+            }
+            row_id.add_done_callback(lambda future: self.publish_violation(future, event))
+        
+        print(f"Violation detected: {license_plate} at {speed:.1f} km/h")
+        return True
+    
+    def publish_violation(self, future, event):
+        """Publish a violation event after its database write succeeded"""
+        if future.exception() is None:
+            event['id'] = future.result()
+            self.event_feed.publish(event['id'], event)
+    
+    def draw_annotations(self, frame, tracked, violations):
+        """
+        Draw bounding boxes, speeds and violations onto the frame
+        
+        Args:
+            frame: OpenCV image (numpy array)
+            tracked: Output of track_frame for this frame
+            violations: Output of check_violations for this frame
             
-            # Calculate speed
-            speed = self.speed_estimator.update_object(obj_id, (x1, y1, x2, y2), frame_number)
+        Returns:
+            Annotated frame
+        """
+        for obj_id, detection, speed in tracked:
+            x1, y1, x2, y2 = detection['bbox']
             
             # Draw bounding box and speed
             cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
             cv2.putText(frame, f"ID: {obj_id}, Speed: {speed:.1f} km/h", 
                       (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
             
-            # Check for speed violation
-            speed_limit = self.config['speed']['limit_kmh']
-            if speed > speed_limit and speed < 200:  # Upper limit to filter outliers
-                # Process license plate if speed is over the limit
-                license_plate = self.license_recognizer.process_vehicle(vehicle_img)
-                
-                if license_plate and len(license_plate) >= 4:
-                    # Create a cooldown key (one violation per minute per plate)
-                    cooldown_key = f"{license_plate}_{frame_number // (self.config['system']['fps'] * 60)}"
-                    
-                    if cooldown_key not in self.violation_cooldown:
-                        self.violation_cooldown[cooldown_key] = True
-                        
-                        # Save violation image
-                        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                        violation_img_path = os.path.join(
-                            self.config['system']['output_dir'], 
-                            'violations', 
-                            f"{license_plate}_{timestamp}.jpg"
-                        )
-                        cv2.imwrite(violation_img_path, vehicle_img)
-                        
-                        # Record violation in database
-                        self.db.record_violation(
-                            license_plate=license_plate,
-                            speed=speed,
-                            speed_limit=speed_limit,
-                            location=self.config['system']['location'],
-                            image_path=violation_img_path
-                        )
-                        
-                        # Send notification if enabled
-                        if self.notification:
-                            violation_data = {
-                                'license_plate': license_plate,
-                                'speed': speed,
-                                'speed_limit': speed_limit,
-                                'location': self.config['system']['location'],
-                                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            }
-                            self.notification.send_email_notification(violation_data)
-                        
-                        print(f"Violation detected: {license_plate} at {speed:.1f} km/h")
-                        
-                        # Display violation on frame
-                        cv2.putText(frame, f"VIOLATION: {license_plate}", 
-                                  (x1, y2 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        
-        # Clean up old tracking objects
-        self.speed_estimator.cleanup_old_objects(frame_number)
+            # Display violation on frame
+            if obj_id in violations:
+                cv2.putText(frame, f"VIOLATION: {violations[obj_id]}", 
+                          (x1, y2 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
         
         return frame
     
+    def process_frame(self, frame, frame_number):
+        tracked = self.track_frame(frame, frame_number)
+        violations = self.check_violations(frame, frame_number, tracked)
+        return self.draw_annotations(frame, tracked, violations)
+    
     def cleanup(self):
         """Clean up resources"""
+        if self.frame_selector is not None:
+            # Read the best crops of tracks still in view, waiting for room in the OCR queue
+            remaining = self.frame_selector.expire(float('inf'), 0)
+            while remaining:
+                for obj_id, candidate in remaining:
+                    if not self.read_candidate(obj_id, candidate):
+                        self.frame_selector.retry_later(obj_id, candidate)
+                remaining = self.frame_selector.expire(float('inf'), 0)
+                if remaining:
+                    time.sleep(0.05)
+        if self.ocr_service is not None:
+            # Finish queued OCR jobs and record their violations
+            self.ocr_service.close()
+            self.collect_ocr_results()
+            stats = self.ocr_service.stats()
+            print(f"OCR: {stats['completed']} jobs, {stats['dropped']} dropped, "
+                  f"latency p50 {stats['latency_p50_ms']:.0f} ms, p95 {stats['latency_p95_ms']:.0f} ms, "
+                  f"p99 {stats['latency_p99_ms']:.0f} ms")
+        
+        # Record tracks still in view whose reads never reached consensus
+        for _, entry in self.plate_cache.expire(float('inf'), 0):
+            if entry['plate'] and not entry['recorded']:
+                entry['recorded'] = True
+                best = entry['best'][1]
+                self.record_violation(entry['plate'], best['speed'], best['vehicle_img'], best['frame_number'])
+        
+        if self.notification:
+            # Send queued emails
+            self.notification.close()
         self.db.close()
+        if self.event_feed:
+            self.event_feed.close()
+
+def is_live_source(source):
+    """Whether an input source is a camera index or a network stream rather than a video file"""
+    source = str(source)
+    return source.isdigit() or source.lower().startswith(('rtsp://', 'rtmp://', 'http://', 'https://', 'udp://', 'tcp://'))
+
+def run_pipelined(system, cap, out, config):
+    """
+    Run capture, detection/tracking, violation/OCR and encode/display as
+    concurrent stages connected by bounded queues
+    
+    Args:
+        system: VehicleDetectionSystem instance
+        cap: Opened cv2.VideoCapture
+        out: cv2.VideoWriter for the annotated output
+        config: Configuration dictionary
+        
+    Returns:
+        Number of frames captured
+    """
+    pipeline_config = config.get('pipeline', {})
+    
+    # "auto" drops stale frames of live sources but never skips frames of a video file
+    backpressure = pipeline_config.get('backpressure', 'block')
+    live_policy = 'drop_oldest' if is_live_source(config['input']) else 'block'
+    if isinstance(backpressure, dict):
+        backpressure = {name: live_policy if policy == 'auto' else policy for name, policy in backpressure.items()}
+    elif backpressure == 'auto':
+        backpressure = live_policy
+    
+    pipeline = Pipeline(
+        queue_size=pipeline_config.get('queue_size', 4),
+        backpressure=backpressure
+    )
+    
+    state = {'frame_number': 0, 'frames_processed': 0, 'start_time': time.time()}
+    
+    def capture():
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        item = {'frame': frame, 'frame_number': state['frame_number']}
+        state['frame_number'] += 1
+        return item
+    
+    def detect(item):
+        item['tracked'] = system.track_frame(item['frame'], item['frame_number'])
+        return item
+    
+    def detect_batch(items):
+        # Decide frame skipping first so only frames that need the detector
+        # go into the batch (decisions are made in frame order)
+        for item in items:
+            item['skip'] = (system.frame_skip is not None
+                            and not system.frame_skip.should_detect(item['frame'], item['frame_number']))
+        detect_items = [item for item in items if not item['skip']]
+        
+        # One forward pass for the whole batch, then track frames in order
+        if detect_items:
+            batch_detections = system.detector.detect_batch([item['frame'] for item in detect_items])
+            for item, detections in zip(detect_items, batch_detections):
+                item['detections'] = detections
+        for item in items:
+            item['tracked'] = system.track_frame(item['frame'], item['frame_number'],
+                                                 item.get('detections'), skip=item['skip'])
+        return items
+    
+    def violations(item):
+        item['violations'] = system.check_violations(item['frame'], item['frame_number'], item['tracked'])
+        return item
+    
+    def render(item):
+        processed_frame = system.draw_annotations(item['frame'], item['tracked'], item['violations'])
+        
+        # Write frame to output video
+        out.write(processed_frame)
+        
+        # Add speed limit display
+        cv2.putText(processed_frame, f"Speed Limit: {config['speed']['limit_kmh']} km/h", 
+                  (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        
+        # Calculate and display FPS
+        state['frames_processed'] += 1
+        if state['frames_processed'] % 10 == 0:
+            elapsed_time = time.time() - state['start_time']
+            current_fps = state['frames_processed'] / elapsed_time if elapsed_time > 0 else 0
+            cv2.putText(processed_frame, f"FPS: {current_fps:.1f}", 
+                      (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        
+        # Display the processed frame (GUI calls stay on the main thread)
+        cv2.imshow('Vehicle Detection System', processed_frame)
+        
+        # Check for exit
+        return not (cv2.waitKey(1) & 0xFF == ord('q'))
+    
+    def idle():
+        # Keep the window responsive while waiting for frames
+        return not (cv2.waitKey(1) & 0xFF == ord('q'))
+    
+    pipeline.set_source('capture', capture)
+    batch_size = config['detection'].get('batch_size', 1)
+    if batch_size > 1:
+        max_wait = config['detection'].get('batch_max_wait_ms', 20) / 1000.0
+        pipeline.add_stage('detect', detect_batch, batch_size=batch_size, max_wait=max_wait)
+    else:
+        pipeline.add_stage('detect', detect)
+    pipeline.add_stage('violation', violations)
+    pipeline.set_sink('render', render)
+    
+    try:
+        pipeline.run(idle=idle)
+    finally:
+        pipeline.print_summary()
+    
+    return state['frame_number']
 
 def main():
     # Parse arguments and load config
@@ -157,9 +712,12 @@ def main():
         config['input'] = args.input
     if args.speed_limit:
         config['speed']['limit_kmh'] = args.speed_limit
+    if args.pipeline:
+        config.setdefault('pipeline', {})['enabled'] = True
     
-    # Initialize the system
+    # Initialize the system and load its models while the capture opens
     system = VehicleDetectionSystem(config)
+    system.warm_up_models()
     
     # Open video capture
     try:
@@ -181,6 +739,10 @@ def main():
         fps = 30  # Default FPS if not available
     config['system']['fps'] = fps
     system.speed_estimator.set_fps(fps)
+    if system.speed_trap:
+        system.speed_trap.set_fps(fps)
+    if system.frame_skip:
+        system.frame_skip.set_fps(fps)
     
     frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
@@ -194,38 +756,41 @@ def main():
     frames_processed = 0
     
     try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        if config.get('pipeline', {}).get('enabled', False):
+            frame_number = run_pipelined(system, cap, out, config)
+        else:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
                 
-            # Process the frame
-            processed_frame = system.process_frame(frame, frame_number)
+                # Process the frame
+                processed_frame = system.process_frame(frame, frame_number)
             
-            # Write frame to output video
-            out.write(processed_frame)
+                # Write frame to output video
+                out.write(processed_frame)
             
-            # Add speed limit display
-            cv2.putText(processed_frame, f"Speed Limit: {config['speed']['limit_kmh']} km/h", 
-                      (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                # Add speed limit display
+                cv2.putText(processed_frame, f"Speed Limit: {config['speed']['limit_kmh']} km/h", 
+                          (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
             
-            # Calculate and display FPS
-            frames_processed += 1
-            if frames_processed % 10 == 0:
-                elapsed_time = time.time() - start_time
-                current_fps = frames_processed / elapsed_time if elapsed_time > 0 else 0
-                cv2.putText(processed_frame, f"FPS: {current_fps:.1f}", 
-                          (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                # Calculate and display FPS
+                frames_processed += 1
+                if frames_processed % 10 == 0:
+                    elapsed_time = time.time() - start_time
+                    current_fps = frames_processed / elapsed_time if elapsed_time > 0 else 0
+                    cv2.putText(processed_frame, f"FPS: {current_fps:.1f}", 
+                              (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
             
-            # Display the processed frame
-            cv2.imshow('Vehicle Detection System', processed_frame)
+                # Display the processed frame
+                cv2.imshow('Vehicle Detection System', processed_frame)
             
-            # Increment frame number
-            frame_number += 1
+                # Increment frame number
+                frame_number += 1
             
-            # Check for exit
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+                # Check for exit
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
                 
     except KeyboardInterrupt:
         print("Processing interrupted by user")
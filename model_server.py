@@ -0,0 +1,145 @@
+# Serves one shared license plate recognizer to several camera processes
+import argparse
+import os
+import threading
+import time
+import yaml
+from multiprocessing.managers import BaseManager
+
+DEFAULT_ADDRESS = ('127.0.0.1', 50055)
+AUTHKEY_ENV = 'MODEL_SERVER_AUTHKEY'  # Overrides license_plate.model_server.authkey
+MIN_AUTHKEY_LENGTH = 16
+
+class SharedRecognizer:
+    """
+    Wraps the server's LicensePlateRecognizer so requests from concurrent
+    client connections run one at a time
+    """
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.lock = threading.Lock()
+
+    def read_plate(self, vehicle_img):
+        with self.lock:
+            return self.recognizer.read_plate(vehicle_img)
+
+    def read_plates(self, vehicle_imgs):
+        with self.lock:
+            return self.recognizer.read_plates(vehicle_imgs)
+
+class ModelServerManager(BaseManager):
+    """Manager exposing the shared recognizer to client processes"""
+
+def parse_address(address):
+    """Turn a 'host:port' string (or a Unix socket path) into a manager address"""
+    if isinstance(address, (list, tuple)):
+        return tuple(address)
+    if ':' in address:
+        host, port = address.rsplit(':', 1)
+        return host, int(port)
+    return address
+
+def resolve_authkey(configured=None):
+    """
+    Get the shared secret for the model server
+
+    The manager exchanges pickles, so anyone holding the key can run code in
+    the server; there is deliberately no default.
+
+    Args:
+        configured: Key from the config file, used if the environment variable is unset
+
+    Returns:
+        The key as bytes
+
+    Raises:
+        ValueError: If no key of at least MIN_AUTHKEY_LENGTH characters is set
+    """
+    authkey = os.environ.get(AUTHKEY_ENV) or configured
+    if not authkey or len(authkey) < MIN_AUTHKEY_LENGTH:
+        raise ValueError(f"Model server needs an authkey of at least {MIN_AUTHKEY_LENGTH} characters; "
+                         f"set {AUTHKEY_ENV} or license_plate.model_server.authkey "
+                         f"(e.g. python -c \"import secrets; print(secrets.token_hex(32))\")")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+def serve(authkey, min_confidence=0.5, min_plate_size=(60, 20), localization=None, address=DEFAULT_ADDRESS):
+    """
+    Load the recognizer once, then serve it until interrupted
+
+    Args:
+        authkey: Shared secret clients must present (see resolve_authkey)
+        min_confidence: Minimum confidence for OCR results
+        min_plate_size: Minimum width and height for license plate candidates
+        localization: license_plate.localization config
+        address: (host, port) or Unix socket path to listen on
+    """
+    authkey = resolve_authkey(authkey)
+    from models.license_plate_recognizer import LicensePlateRecognizer
+
+    start = time.perf_counter()
+    recognizer = LicensePlateRecognizer(min_confidence=min_confidence, min_plate_size=min_plate_size,
+                                        localization=localization)
+    recognizer.warm_up()
+    shared = SharedRecognizer(recognizer)
+    print(f"Recognizer loaded in {time.perf_counter() - start:.2f} s")
+
+    ModelServerManager.register('recognizer', callable=lambda: shared, exposed=('read_plate', 'read_plates'))
+    manager = ModelServerManager(address=parse_address(address), authkey=authkey)
+    server = manager.get_server()
+    print(f"Model server listening on {server.address}")
+    server.serve_forever()
+
+class RemoteRecognizer:
+    """
+    Client for a running model server, usable wherever a
+    LicensePlateRecognizer's read_plate / read_plates are called
+    """
+    def __init__(self, authkey, address=DEFAULT_ADDRESS):
+        """
+        Connect to the model server
+
+        Args:
+            authkey: Shared secret configured on the server (see resolve_authkey)
+            address: (host, port) or Unix socket path of the server
+        """
+        ModelServerManager.register('recognizer')
+        self.manager = ModelServerManager(address=parse_address(address), authkey=resolve_authkey(authkey))
+        self.manager.connect()
+        self.proxy = self.manager.recognizer()
+
+    def read_plate(self, vehicle_img):
+        """Extract the license plate from a vehicle image on the server"""
+        return self.proxy.read_plate(vehicle_img)
+
+    def read_plates(self, vehicle_imgs):
+        """Extract license plates from several vehicle images on the server"""
+        return self.proxy.read_plates(vehicle_imgs)
+
+    def warm_up(self):
+        """The server loads its model before accepting connections"""
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the license plate recognizer to camera processes')
+    parser.add_argument('--config', type=str, default='config.yaml', help='Path to configuration file')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as file:
+        config = yaml.safe_load(file)
+    plate_config = config['license_plate']
+    server_config = plate_config.get('model_server', {})
+
+    try:
+        serve(
+            authkey=server_config.get('authkey'),
+            min_confidence=plate_config['min_confidence'],
+            min_plate_size=plate_config['min_plate_size'],
+            localization=plate_config.get('localization'),
+            address=server_config.get('address', DEFAULT_ADDRESS)
+        )
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+    except KeyboardInterrupt:
+        print("Model server stopped")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
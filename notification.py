@@ -4,6 +4,9 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import logging
 import os
+import queue
+import threading
+import time
 
 # Configure logging
 logging.basicConfig(
@@ -13,51 +16,148 @@ logging.basicConfig(
 )
 logger = logging.getLogger('ViolationNotification')
 
+def normalize_email_config(email_config):
+    """
+    Accept both the documented keys and the config.yaml spelling
+    ('smtp_port', a single 'recipient')
+    
+    Returns:
+        Email config dictionary, or None if no SMTP server is configured
+    """
+    if not email_config or not email_config.get('smtp_server'):
+        return None
+    config = dict(email_config)
+    config.setdefault('port', config.get('smtp_port', 587))
+    recipients = config.get('recipients', config.get('recipient', []))
+    config['recipients'] = [recipients] if isinstance(recipients, str) else list(recipients)
+    config.setdefault('sender', config.get('username'))
+    config.setdefault('use_tls', True)
+    return config
+
 class NotificationSystem:
     """System for sending notifications about speed violations"""
     
-    def __init__(self, email_config=None):
+    def __init__(self, email_config=None, queue_size=100, digest_interval=0, max_retries=3,
+                 retry_backoff=1.0, idle_timeout=60):
         """
         Initialize notification system
         
+        Emails are sent by a background dispatcher thread that keeps one
+        authenticated SMTP connection open between messages.
+        
         Args:
             email_config: Dictionary with email configuration (optional)
                           Should contain: 'smtp_server', 'port', 'username', 'password',
-                          'sender', 'recipients'
+                          'sender', 'recipients' (optionally 'use_tls')
+            queue_size: Maximum violations waiting to be emailed; further ones are dropped
+            digest_interval: If > 0, merge the violations of each interval (seconds) into one email
+            max_retries: Send attempts after the first before a message is dropped
+            retry_backoff: Seconds before the first retry, doubled for each further one
+            idle_timeout: Seconds after which an unused SMTP connection is closed
         """
         # Default to log-based notifications if no email config provided
-        self.email_config = email_config
+        self.email_config = normalize_email_config(email_config)
         self.notification_log = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
                                          'output', 'notifications.log')
         
         # Ensure log directory exists
         os.makedirs(os.path.dirname(self.notification_log), exist_ok=True)
         
+        self.digest_interval = digest_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.smtp = None  # Reused SMTP connection, opened on demand
+        self.last_used = 0.0
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self.dispatcher = None
+        if self.email_config:
+            self.dispatcher = threading.Thread(target=self._dispatch_loop, name='notification-dispatcher', daemon=True)
+            self.dispatcher.start()
+        
     def send_violation_notification(self, violation_data):
         """
         Send notification about a speed violation
         
+        The violation is logged immediately; the email is queued for the
+        dispatcher thread so the caller never waits on SMTP.
+        
         Args:
             violation_data: Dictionary with violation details
                             Should contain: license_plate, speed, speed_limit,
                             location, timestamp, image_path
                             
         Returns:
-            Boolean indicating success or failure
+            Boolean indicating success or failure (False if the email queue is full)
         """
         try:
             # Log the violation
             self._log_violation(violation_data)
             
-            # Send email if configured
+            # Queue email if configured
             if self.email_config:
-                self._send_email_notification(violation_data)
+                try:
+                    self.queue.put_nowait(violation_data)
+                except queue.Full:
+                    self.dropped += 1
+                    logger.warning(f"Email queue full, dropped notification for {violation_data['license_plate']}")
+                    return False
                 
             return True
             
         except Exception as e:
             logger.error(f"Failed to send notification: {str(e)}")
             return False
+    
+    def close(self, timeout=None):
+        """
+        Send queued emails, then stop the dispatcher and close the SMTP connection
+        
+        Args:
+            timeout: Maximum seconds to wait for the dispatcher
+        """
+        if self.dispatcher is not None:
+            self.queue.put(None)
+            self.dispatcher.join(timeout)
+            self.dispatcher = None
+    
+    def _dispatch_loop(self):
+        """Send queued violations one message each, or as digests, until close()"""
+        running = True
+        while running:
+            try:
+                item = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                # Don't hold an idle connection open indefinitely
+                if self.smtp is not None and time.monotonic() - self.last_used > self.idle_timeout:
+                    self._disconnect()
+                continue
+            if item is None:
+                break
+            
+            batch = [item]
+            if self.digest_interval > 0:
+                deadline = time.monotonic() + self.digest_interval
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self.queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        running = False
+                        break
+                    batch.append(item)
+                self._send_email_notification(*batch)
+            else:
+                for violation_data in batch:
+                    self._send_email_notification(violation_data)
+        self._disconnect()
             
     def _log_violation(self, violation_data):
         """Log violation to file"""
@@ -78,19 +178,20 @@ class NotificationSystem:
         with open(self.notification_log, 'a') as f:
             f.write(f"{message}\n")
             
-    def _send_email_notification(self, violation_data):
-        """Send email notification"""
-        if not self.email_config:
-            return False
-            
-        # Create message
+    def _build_message(self, violations):
+        """Create one email for a single violation or a digest of several"""
         msg = MIMEMultipart()
         msg['From'] = self.email_config['sender']
         msg['To'] = ', '.join(self.email_config['recipients'])
-        msg['Subject'] = f"Speed Violation: {violation_data['license_plate']}"
+        if len(violations) == 1:
+            msg['Subject'] = f"Speed Violation: {violations[0]['license_plate']}"
+        else:
+            msg['Subject'] = f"Speed Violations: {len(violations)} vehicles"
         
         # Message body
-        body = f"""
+        sections = []
+        for violation_data in violations:
+            sections.append(f"""
         Speed Violation Detected:
         
         License Plate: {violation_data['license_plate']}
@@ -98,21 +199,54 @@ class NotificationSystem:
         Speed Limit: {violation_data['speed_limit']} km/h
         Location: {violation_data['location']}
         Time: {violation_data['timestamp']}
-        
+        """)
+        body = ''.join(sections) + """
         This is an automated notification.
         """
         
         msg.attach(MIMEText(body, 'plain'))
+        return msg
+    
+    def _connect(self):
+        """Open and authenticate the SMTP connection unless one is already open"""
+        if self.smtp is None:
+            server = smtplib.SMTP(self.email_config['smtp_server'], self.email_config['port'], timeout=30)
+            if self.email_config['use_tls']:
+                server.starttls()
+            if self.email_config.get('username'):
+                server.login(self.email_config['username'], self.email_config['password'])
+            self.smtp = server
+        return self.smtp
+    
+    def _disconnect(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self.smtp.close()
+            self.smtp = None
+    
+    def _send_email_notification(self, *violations):
+        """Send email notification for one or more violations, retrying with backoff"""
+        if not self.email_config:
+            return False
+        msg = self._build_message(violations)
+        plates = ', '.join(v['license_plate'] for v in violations)
         
-        # Connect to server and send
-        try:
-            server = smtplib.SMTP(self.email_config['smtp_server'], self.email_config['port'])
-            server.starttls()
-            server.login(self.email_config['username'], self.email_config['password'])
-            server.send_message(msg)
-            server.quit()
-            logger.info(f"Email notification sent for {violation_data['license_plate']}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to send email: {str(e)}")
-            return False
\ No newline at end of file
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._connect().send_message(msg)
+                self.last_used = time.monotonic()
+                self.sent += 1
+                logger.info(f"Email notification sent for {plates}")
+                return True
+            except (smtplib.SMTPException, OSError) as e:
+                # The connection may be dead; reconnect on the next attempt
+                logger.warning(f"Failed to send email (attempt {attempt + 1}): {str(e)}")
+                self._disconnect()
+                if attempt < self.max_retries:
+                    time.sleep(self.retry_backoff * 2 ** attempt)
+        
+        self.failed += 1
+        logger.error(f"Giving up on email notification for {plates}")
+        return False
\ No newline at end of file
@@ -0,0 +1,158 @@
+import collections
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# License plate recognizer owned by each worker process
+_recognizer = None
+
+def _init_worker(min_confidence, min_plate_size, localization):
+    global _recognizer
+    from models.license_plate_recognizer import LicensePlateRecognizer
+    _recognizer = LicensePlateRecognizer(min_confidence=min_confidence, min_plate_size=min_plate_size,
+                                         localization=localization)
+    _recognizer.warm_up()
+
+def _ready():
+    return _recognizer is not None
+
+def _recognize(vehicle_img):
+    start = time.perf_counter()
+    plate, confidence = _recognizer.read_plate(vehicle_img)
+    return plate, confidence, time.perf_counter() - start
+
+class OCRService:
+    """
+    Runs license plate OCR for violation candidates in a process pool so
+    the frame loop never waits on EasyOCR
+    """
+    def __init__(self, workers=2, max_pending=8, min_confidence=0.5, min_plate_size=(60, 20), localization=None):
+        """
+        Initialize the OCR service
+
+        Args:
+            workers: Number of OCR worker processes
+            max_pending: Maximum queued or running jobs; further jobs are dropped
+            min_confidence: Minimum confidence for OCR results
+            min_plate_size: Minimum width and height for license plate candidates
+            localization: license_plate.localization config for the workers' recognizers
+        """
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),  # Don't fork a process holding model threads
+            initializer=_init_worker,
+            initargs=(min_confidence, tuple(min_plate_size), localization)
+        )
+        self.workers = workers
+        self.max_pending = max_pending
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.ocr_times = collections.deque(maxlen=1000)  # Seconds spent in OCR per job
+        self.latencies = collections.deque(maxlen=1000)  # Seconds from submit to result per job
+
+    def warm_up(self):
+        """
+        Start every worker process and wait until their recognizers are loaded
+
+        The pool only spawns workers as jobs are submitted, so without this
+        the first violations would wait for a worker to start and load EasyOCR.
+        """
+        futures = [self.executor.submit(_ready) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def submit(self, track_id, vehicle_img, speed, frame_number):
+        """
+        Queue a violation candidate for OCR without blocking
+
+        Args:
+            track_id: Tracker object ID
+            vehicle_img: Image of the vehicle (copied before queueing)
+            speed: Measured speed in km/h
+            frame_number: Frame the crop was taken from
+
+        Returns:
+            True if the job was queued, False if it was dropped because the queue is full
+        """
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.pending += 1
+            self.submitted += 1
+
+        # Own the pixels so the job doesn't pin (or race with) the whole frame
+        vehicle_img = np.ascontiguousarray(vehicle_img).copy()
+        job = {
+            'track_id': track_id,
+            'vehicle_img': vehicle_img,
+            'speed': speed,
+            'frame_number': frame_number,
+            'submitted': time.perf_counter()
+        }
+        future = self.executor.submit(_recognize, vehicle_img)
+        future.add_done_callback(lambda f: self._on_done(job, f))
+        return True
+
+    def _on_done(self, job, future):
+        with self.lock:
+            self.pending -= 1
+            self.latencies.append(time.perf_counter() - job['submitted'])
+            try:
+                job['license_plate'], job['confidence'], ocr_time = future.result()
+                self.ocr_times.append(ocr_time)
+                self.completed += 1
+            except Exception as e:
+                print(f"Error in OCR worker: {e}")
+                job['license_plate'], job['confidence'] = None, 0.0
+                self.failed += 1
+        self.results.put(job)
+
+    def poll_results(self):
+        """
+        Get all jobs that finished since the last call
+
+        Returns:
+            List of job dictionaries with 'track_id', 'vehicle_img', 'speed',
+            'frame_number', 'license_plate' (None if nothing was read) and 'confidence'
+        """
+        finished = []
+        while True:
+            try:
+                finished.append(self.results.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def stats(self):
+        """
+        Get queue and latency statistics
+
+        Returns:
+            Dictionary with queue depth, job counts and OCR / end-to-end
+            latency percentiles in milliseconds
+        """
+        with self.lock:
+            stats = {
+                'queue_depth': self.pending,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'dropped': self.dropped,
+                'failed': self.failed
+            }
+            for name, samples in (('ocr', self.ocr_times), ('latency', self.latencies)):
+                values = np.array(samples) * 1000 if samples else np.zeros(1)
+                for p in (50, 95, 99):
+                    stats[f'{name}_p{p}_ms'] = float(np.percentile(values, p))
+        return stats
+
+    def close(self, wait=True):
+        """Stop the worker processes, by default after finishing queued jobs"""
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
\ No newline at end of file
@@ -0,0 +1,350 @@
+import collections
+import queue
+import threading
+import time
+
+# Backpressure policies for the queues between stages
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+BACKPRESSURE_POLICIES = (BLOCK, DROP_OLDEST)
+
+
+class BoundedQueue:
+    """
+    Bounded FIFO queue connecting two pipeline stages
+    """
+    def __init__(self, maxsize=4, policy=BLOCK):
+        """
+        Initialize the queue
+
+        Args:
+            maxsize: Maximum number of items held before backpressure applies
+            policy: 'block' to make the producer wait for space,
+                    'drop_oldest' to discard the oldest queued item instead
+        """
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.items = collections.deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """
+        Add an item to the queue, applying the backpressure policy when full
+
+        Returns:
+            True if the item was queued, False if the queue is closed
+        """
+        with self.condition:
+            if self.policy == BLOCK:
+                while len(self.items) >= self.maxsize and not self.closed:
+                    self.condition.wait()
+            elif len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+
+            if self.closed:
+                return False
+
+            self.items.append(item)
+            self.condition.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """
+        Take the next item from the queue
+
+        Args:
+            timeout: Seconds to wait for an item (None waits forever)
+
+        Returns:
+            The next item, or None once the queue is closed and drained
+
+        Raises:
+            queue.Empty: If no item arrived within the timeout
+        """
+        with self.condition:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.items:
+                if self.closed:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self.condition.wait(remaining)
+
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def get_batch(self, max_items, max_wait=0.0):
+        """
+        Take up to max_items items, waiting at most max_wait seconds after the
+        first item arrives for the batch to fill
+
+        Args:
+            max_items: Maximum batch size
+            max_wait: Seconds to wait for further items once one is available
+
+        Returns:
+            List of items, empty once the queue is closed and drained
+        """
+        first = self.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + max_wait
+        with self.condition:
+            while len(batch) < max_items:
+                if self.items:
+                    batch.append(self.items.popleft())
+                    self.condition.notify_all()
+                    continue
+                remaining = deadline - time.monotonic()
+                if self.closed or remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+        return batch
+
+    def close(self):
+        """Close the queue; consumers drain remaining items then receive None"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __len__(self):
+        with self.condition:
+            return len(self.items)
+
+
+class StageStats:
+    """
+    Latency counters for a single pipeline stage
+    """
+    def __init__(self, name, window=100):
+        self.name = name
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.recent = collections.deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, elapsed):
+        """Record the processing time (in seconds) of one item"""
+        with self.lock:
+            self.count += 1
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+            self.recent.append(elapsed)
+
+    def summary(self):
+        """
+        Get latency statistics for the stage
+
+        Returns:
+            Dictionary with item count and mean/recent/max latency in milliseconds
+        """
+        with self.lock:
+            mean = self.total_time / self.count if self.count else 0.0
+            recent = sum(self.recent) / len(self.recent) if self.recent else 0.0
+            return {
+                'count': self.count,
+                'mean_ms': mean * 1000,
+                'recent_ms': recent * 1000,
+                'max_ms': self.max_time * 1000
+            }
+
+
+class Pipeline:
+    """
+    Runs a source, a chain of processing stages and a sink concurrently,
+    connected by bounded queues so throughput is limited by the slowest stage
+    """
+    def __init__(self, queue_size=4, backpressure=None):
+        """
+        Initialize the pipeline
+
+        Args:
+            queue_size: Capacity of each queue between stages
+            backpressure: Policy for all queues ('block' or 'drop_oldest'), or a
+                          dictionary mapping stage names to policies. The policy
+                          of a stage applies to the queue feeding it.
+        """
+        self.queue_size = queue_size
+        self.backpressure = backpressure if backpressure is not None else BLOCK
+        self.source = None
+        self.stages = []
+        self.sink = None
+        self.queues = {}
+        self.stats = {}
+        self.threads = []
+        self.stop_event = threading.Event()
+
+    def _policy_for(self, name):
+        if isinstance(self.backpressure, dict):
+            return self.backpressure.get(name, BLOCK)
+        return self.backpressure
+
+    def _register(self, name):
+        if name in self.stats:
+            raise ValueError(f"Duplicate stage name: {name}")
+        self.stats[name] = StageStats(name)
+
+    def set_source(self, name, func):
+        """
+        Set the source stage
+
+        Args:
+            name: Stage name
+            func: Callable returning the next item, or None when exhausted
+        """
+        self._register(name)
+        self.source = (name, func)
+
+    def add_stage(self, name, func, batch_size=1, max_wait=0.0):
+        """
+        Append a processing stage
+
+        Args:
+            name: Stage name
+            func: Callable taking an item and returning the item for the next
+                  stage, or None to drop it. If batch_size > 1 it instead takes
+                  a list of items and returns a list of items.
+            batch_size: Maximum number of items handed to func at once
+            max_wait: Seconds to wait for a batch to fill before running it
+        """
+        self._register(name)
+        self.queues[name] = BoundedQueue(self.queue_size, self._policy_for(name))
+        self.stages.append((name, func, batch_size, max_wait))
+
+    def set_sink(self, name, func):
+        """
+        Set the sink stage, which runs on the thread calling run()
+
+        Args:
+            name: Stage name
+            func: Callable taking an item; returning False stops the pipeline
+        """
+        self._register(name)
+        self.queues[name] = BoundedQueue(self.queue_size, self._policy_for(name))
+        self.sink = (name, func)
+
+    def _timed(self, name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.stats[name].record(time.perf_counter() - start)
+        return result
+
+    def _run_source(self, name, func, out_queue):
+        try:
+            while not self.stop_event.is_set():
+                item = self._timed(name, func)
+                if item is None:
+                    break
+                if not out_queue.put(item):
+                    break
+        finally:
+            out_queue.close()
+
+    def _run_stage(self, name, func, batch_size, max_wait, in_queue, out_queue):
+        try:
+            while True:
+                if batch_size > 1:
+                    items = in_queue.get_batch(batch_size, max_wait)
+                    if not items:
+                        break
+                    results = self._timed(name, func, items)
+                else:
+                    item = in_queue.get()
+                    if item is None:
+                        break
+                    results = [self._timed(name, func, item)]
+                if not all(out_queue.put(r) for r in results if r is not None):
+                    break
+        finally:
+            out_queue.close()
+            # Unblock upstream producers if we stopped early
+            in_queue.close()
+
+    def run(self, poll_interval=0.01, idle=None):
+        """
+        Start all stages and run the sink on the calling thread until the
+        source is exhausted or the sink requests a stop
+
+        Args:
+            poll_interval: Seconds to wait for an item before calling idle
+            idle: Optional callable invoked while the sink waits for items;
+                  returning False stops the pipeline
+        """
+        if self.source is None or self.sink is None:
+            raise ValueError("Pipeline requires a source and a sink")
+
+        names = [stage[0] for stage in self.stages] + [self.sink[0]]
+        queue_chain = [self.queues[name] for name in names]
+
+        self.stop_event.clear()
+        self.threads = [threading.Thread(target=self._run_source,
+                                         args=(self.source[0], self.source[1], queue_chain[0]),
+                                         daemon=True)]
+        for i, (name, func, batch_size, max_wait) in enumerate(self.stages):
+            self.threads.append(threading.Thread(target=self._run_stage,
+                                                 args=(name, func, batch_size, max_wait,
+                                                       queue_chain[i], queue_chain[i + 1]),
+                                                 daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+        sink_name, sink_func = self.sink
+        sink_queue = queue_chain[-1]
+        try:
+            while True:
+                try:
+                    item = sink_queue.get(timeout=poll_interval)
+                except queue.Empty:
+                    if idle is not None and idle() is False:
+                        break
+                    continue
+                if item is None:
+                    break
+                if self._timed(sink_name, sink_func, item) is False:
+                    break
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop all stages and wait for their threads to finish"""
+        self.stop_event.set()
+        for q in self.queues.values():
+            q.close()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def summary(self):
+        """
+        Get per-stage latency counters and queue statistics
+
+        Returns:
+            Dictionary mapping stage names to statistics dictionaries
+        """
+        summary = {}
+        for name, stats in self.stats.items():
+            summary[name] = stats.summary()
+            if name in self.queues:
+                summary[name]['queue_depth'] = len(self.queues[name])
+                summary[name]['dropped'] = self.queues[name].dropped
+        return summary
+
+    def print_summary(self):
+        """Print per-stage latency counters"""
+        print("Pipeline stage statistics:")
+        for name, stats in self.summary().items():
+            line = (f"  {name}: {stats['count']} items, mean {stats['mean_ms']:.1f} ms, "
+                    f"recent {stats['recent_ms']:.1f} ms, max {stats['max_ms']:.1f} ms")
+            if 'dropped' in stats:
+                line += f", dropped {stats['dropped']}"
+            print(line)
\ No newline at end of file
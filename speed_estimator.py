@@ -1,29 +1,126 @@
 import numpy as np
 import time
+from collections import deque
 
 class SpeedEstimator:
     """
     Estimates vehicle speed based on movement between frames
+    
+    Per-object history is kept in fixed-capacity ring buffers laid out as
+    preallocated arrays indexed by a track slot, so memory does not grow with
+    how long a vehicle stays visible. Positions are stored in metres on the
+    ground plane.
     """
-    def __init__(self, distance_calibration=10.0, max_age_frames=30):
+    def __init__(self, distance_calibration=10.0, max_age_frames=30, history_size=32, smoothing_window=5,
+                 capacity=64, ground_lookup=None):
         """
         Initialize the speed estimator
         
         Args:
             distance_calibration: Real-world distance in meters that corresponds to specific pixel distance
             max_age_frames: Maximum frames to keep object in tracking queue
+            history_size: Number of positions and speeds kept per object
+            smoothing_window: Number of recent speeds averaged into the reported speed
+            capacity: Initial number of object slots (grows as needed)
+            ground_lookup: Optional GroundPlaneLookup from homography calibration;
+                           replaces distance_calibration when set
         """
         self.distance_calibration = distance_calibration
-        self.tracked_objects = {}
+        self.ground_lookup = ground_lookup
         self.fps = 30  # Default FPS, will be updated
         self.max_age_frames = max_age_frames
-        self.last_cleanup = 0
+        self.smoothing_window = max(1, int(smoothing_window))
+        self.history_size = max(int(history_size), self.smoothing_window)
+        
+        # Structure of arrays: row = object slot, column = ring buffer position
+        self.positions = np.zeros((capacity, self.history_size, 2))
+        self.timestamps = np.zeros((capacity, self.history_size))
+        self.frame_numbers = np.zeros((capacity, self.history_size), dtype=np.int64)
+        self.speeds = np.zeros((capacity, self.history_size))
+        self.position_count = np.zeros(capacity, dtype=np.int64)  # Positions written per slot
+        self.speed_count = np.zeros(capacity, dtype=np.int64)  # Speeds written per slot
+        self.filtered = np.zeros(capacity, dtype=bool)  # Latest speed came from a filtered velocity
+        
+        self.slots = {}  # Object ID -> slot
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        
+        # (frame number, object IDs seen on it) in frame order, so cleanup
+        # only visits entries old enough to have expired
+        self.expiry_queue = deque()
     
     def set_fps(self, fps):
         """Set the frames per second for speed calculation"""
         self.fps = fps if fps > 0 else 30
     
-    def update_object(self, object_id, bbox, frame_number):
+    def _grow(self):
+        capacity = len(self.position_count)
+        for name in ('positions', 'timestamps', 'frame_numbers', 'speeds', 'position_count', 'speed_count', 'filtered'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+        self.free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+    
+    def _allocate(self, object_id):
+        if not self.free_slots:
+            self._grow()
+        slot = self.free_slots.pop()
+        self.position_count[slot] = 0
+        self.speed_count[slot] = 0
+        self.filtered[slot] = False
+        self.slots[object_id] = slot
+        return slot
+    
+    def _release(self, object_id):
+        self.free_slots.append(self.slots.pop(object_id))
+    
+    def _to_ground(self, centers):
+        """Convert (N, 2) pixel positions to ground positions in metres"""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        if self.ground_lookup is not None:
+            return self.ground_lookup.to_world(centers)
+        return centers / self.distance_calibration
+    
+    def _velocity_to_ground(self, centers, velocities):
+        """Convert (N, 2) pixel-per-frame velocities at the given pixel positions to metres per frame"""
+        velocities = np.asarray(velocities, dtype=np.float64).reshape(-1, 2)
+        if self.ground_lookup is not None:
+            centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+            return self.ground_lookup.to_world(centers + velocities) - self.ground_lookup.to_world(centers)
+        return velocities / self.distance_calibration
+    
+    def _mark_seen(self, object_ids, frame_number):
+        if self.expiry_queue and self.expiry_queue[-1][0] == frame_number:
+            self.expiry_queue[-1][1].extend(object_ids)
+        else:
+            self.expiry_queue.append((frame_number, list(object_ids)))
+    
+    def _push_position(self, slot, position, timestamp, frame_number):
+        index = self.position_count[slot] % self.history_size
+        self.positions[slot, index] = position
+        self.timestamps[slot, index] = timestamp
+        self.frame_numbers[slot, index] = frame_number
+        self.position_count[slot] += 1
+    
+    def _push_speed(self, slot, speed):
+        self.speeds[slot, self.speed_count[slot] % self.history_size] = speed
+        self.speed_count[slot] += 1
+    
+    def _last_index(self, slot):
+        return (self.position_count[slot] - 1) % self.history_size
+    
+    def _smoothed_speed(self, slot):
+        count = min(self.speed_count[slot], self.smoothing_window)
+        if count == 0:
+            return 0
+        indices = (self.speed_count[slot] - 1 - np.arange(count)) % self.history_size
+        return float(self.speeds[slot, indices].mean())
+    
+    def _current_speed(self, slot):
+        """Latest filtered speed as is, or the average of recent differentiated speeds"""
+        if self.filtered[slot]:
+            return float(self.speeds[slot, (self.speed_count[slot] - 1) % self.history_size])
+        return self._smoothed_speed(slot)
+    
+    def update_object(self, object_id, bbox, frame_number, velocity=None):
         """
         Update object position and calculate speed
         
@@ -31,6 +128,9 @@ class SpeedEstimator:
             object_id: Unique ID of tracked object
             bbox: Bounding box (x1, y1, x2, y2)
             frame_number: Current frame number
+            velocity: Optional filtered centroid velocity (vx, vy) in pixels per
+                      frame from the tracker, used instead of differentiating
+                      positions; None until the tracker's estimate has converged
             
         Returns:
             Estimated speed in km/h
@@ -38,58 +138,158 @@ class SpeedEstimator:
         # Calculate center of bounding box
         center_x = (bbox[0] + bbox[2]) / 2
         center_y = (bbox[1] + bbox[3]) / 2
+        position = self._to_ground((center_x, center_y))[0]
         
         current_time = frame_number / self.fps if self.fps > 0 else time.time()
         
-        if object_id in self.tracked_objects:
+        slot = self.slots.get(object_id)
+        if slot is not None:
             # Calculate speed based on pixel movement and time difference
-            prev_pos = self.tracked_objects[object_id]['positions'][-1]
-            prev_time = self.tracked_objects[object_id]['timestamps'][-1]
+            last = self._last_index(slot)
+            prev_pos = self.positions[slot, last]
+            prev_time = self.timestamps[slot, last]
             
-            pixel_distance = np.sqrt((center_x - prev_pos[0])**2 + (center_y - prev_pos[1])**2)
+            distance = np.hypot(position[0] - prev_pos[0], position[1] - prev_pos[1])
             time_diff = current_time - prev_time
             
             if time_diff > 0:
-                # Convert pixel distance to real-world distance using calibration
-                # and calculate speed in km/h
-                speed = (pixel_distance / self.distance_calibration) * (1.0 / time_diff) * 3.6  # km/h
-                self.tracked_objects[object_id]['speeds'].append(speed)
+                if velocity is not None:
+                    # Filtered velocity is already smooth: metres/frame -> km/h
+                    ground_velocity = self._velocity_to_ground((center_x, center_y), velocity)[0]
+                    speed = np.hypot(ground_velocity[0], ground_velocity[1]) * self.fps * 3.6
+                else:
+                    # Real-world distance over elapsed time in km/h
+                    speed = distance * (1.0 / time_diff) * 3.6  # km/h
+                self._push_speed(slot, speed)
+                self.filtered[slot] = velocity is not None
                 
                 # Update position and timestamp
-                self.tracked_objects[object_id]['positions'].append((center_x, center_y))
-                self.tracked_objects[object_id]['timestamps'].append(current_time)
-                self.tracked_objects[object_id]['frame_numbers'].append(frame_number)
+                self._push_position(slot, position, current_time, frame_number)
+                self._mark_seen([object_id], frame_number)
                 
-                # Return average speed over last few measurements to smooth results
-                recent_speeds = self.tracked_objects[object_id]['speeds'][-5:]
-                return sum(recent_speeds) / len(recent_speeds) if recent_speeds else 0
+                # Filtered speed as is, otherwise the average over the last few measurements
+                return self._current_speed(slot)
             else:
                 return 0
         else:
             # Initialize tracking for new object
-            self.tracked_objects[object_id] = {
-                'positions': [(center_x, center_y)],
-                'timestamps': [current_time],
-                'frame_numbers': [frame_number],
-                'speeds': []
-            }
+            slot = self._allocate(object_id)
+            self._push_position(slot, position, current_time, frame_number)
+            self._mark_seen([object_id], frame_number)
+            return 0
+    
+    def update_frame(self, ids, bboxes, frame_number, velocities=None):
+        """
+        Update all objects visible in a frame and calculate their speeds in
+        one vectorized pass
+        
+        Args:
+            ids: Sequence of unique object IDs
+            bboxes: Bounding boxes (x1, y1, x2, y2) aligned with ids
+            frame_number: Current frame number
+            velocities: Optional filtered centroid velocities (vx, vy) in pixels
+                        per frame aligned with ids, used instead of differentiating
+                        positions; None entries (estimate not converged yet)
+                        fall back to differentiation
+            
+        Returns:
+            Array of estimated speeds in km/h aligned with ids
+        """
+        ids = list(ids)
+        count = len(ids)
+        speeds = np.zeros(count)
+        if count == 0:
+            return speeds
+        
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        centers = (bboxes[:, :2] + bboxes[:, 2:]) / 2
+        positions = self._to_ground(centers)
+        current_time = frame_number / self.fps if self.fps > 0 else time.time()
+        
+        # Look up slots, allocating for new objects
+        is_new = np.zeros(count, dtype=bool)
+        slots = np.empty(count, dtype=np.int64)
+        for i, object_id in enumerate(ids):
+            slot = self.slots.get(object_id)
+            if slot is None:
+                slot = self._allocate(object_id)
+                is_new[i] = True
+            slots[i] = slot
+        
+        # Displacement and elapsed time since each object's previous position
+        last = (self.position_count[slots] - 1) % self.history_size
+        time_diff = current_time - self.timestamps[slots, last]
+        moving = ~is_new & (time_diff > 0)
+        
+        displacement = positions - self.positions[slots, last]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            raw_speeds = np.hypot(displacement[:, 0], displacement[:, 1]) / time_diff * 3.6
+        
+        filtered = np.zeros(count, dtype=bool)
+        if velocities is not None:
+            filtered = np.array([velocity is not None for velocity in velocities], dtype=bool)
+            if filtered.any():
+                # Filtered velocity is already smooth: metres/frame -> km/h
+                ground_velocities = self._velocity_to_ground(
+                    centers[filtered], [velocity for velocity in velocities if velocity is not None])
+                raw_speeds[filtered] = np.hypot(ground_velocities[:, 0], ground_velocities[:, 1]) * self.fps * 3.6
+        
+        # Append speeds of moving objects
+        moved = slots[moving]
+        self.speeds[moved, self.speed_count[moved] % self.history_size] = raw_speeds[moving]
+        self.speed_count[moved] += 1
+        self.filtered[moved] = filtered[moving]
+        
+        # Append positions of new and moving objects
+        written = moving | is_new
+        updated = slots[written]
+        index = self.position_count[updated] % self.history_size
+        self.positions[updated, index] = positions[written]
+        self.timestamps[updated, index] = current_time
+        self.frame_numbers[updated, index] = frame_number
+        self.position_count[updated] += 1
+        self._mark_seen([ids[i] for i in np.flatnonzero(written)], frame_number)
+        
+        # Filtered speeds as is, others averaged over the last few measurements
+        window = np.arange(self.smoothing_window)
+        recent = (self.speed_count[moved, None] - 1 - window) % self.history_size
+        valid = window < np.minimum(self.speed_count[moved], self.smoothing_window)[:, None]
+        totals = np.where(valid, self.speeds[moved[:, None], recent], 0.0).sum(axis=1)
+        smoothed = totals / np.maximum(valid.sum(axis=1), 1)
+        speeds[moving] = np.where(filtered[moving], raw_speeds[moving], smoothed)
+        
+        return speeds
+    
+    def get_speed(self, object_id):
+        """
+        Get the latest speed of an object without adding a measurement, the
+        same value the last update returned for it
+        
+        Args:
+            object_id: Unique ID of tracked object
+            
+        Returns:
+            Estimated speed in km/h, or 0 if unknown
+        """
+        if object_id not in self.slots:
             return 0
+        return self._current_speed(self.slots[object_id])
     
     def cleanup_old_objects(self, current_frame_number):
         """
         Remove objects that haven't been seen recently
         
+        Only entries old enough to have expired are visited, so the cost is
+        proportional to the number of expired sightings rather than the
+        number of tracked objects.
+        
         Args:
             current_frame_number: Current frame number
         """
-        if current_frame_number - self.last_cleanup > 10:  # Do cleanup every 10 frames
-            objects_to_remove = []
-            
-            for obj_id, data in self.tracked_objects.items():
-                if current_frame_number - data['frame_numbers'][-1] > self.max_age_frames:
-                    objects_to_remove.append(obj_id)
-            
-            for obj_id in objects_to_remove:
-                del self.tracked_objects[obj_id]
-            
-            self.last_cleanup = current_frame_number
\ No newline at end of file
+        while self.expiry_queue and current_frame_number - self.expiry_queue[0][0] > self.max_age_frames:
+            frame_number, object_ids = self.expiry_queue.popleft()
+            for obj_id in object_ids:
+                slot = self.slots.get(obj_id)
+                # Skip objects seen again since this entry was queued
+                if slot is not None and self.frame_numbers[slot, self._last_index(slot)] == frame_number:
+                    self._release(obj_id)
\ No newline at end of file
@@ -0,0 +1,149 @@
+import numpy as np
+from collections import OrderedDict
+
+def cross(a, b):
+    """2D cross product, broadcasting over leading dimensions"""
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+def segment_crossings(starts, ends, line_starts, line_ends):
+    """
+    Find where movement segments cross trap lines
+
+    Args:
+        starts: (N, 2) previous centroid positions
+        ends: (N, 2) current centroid positions
+        line_starts: (M, 2) first endpoints of the lines
+        line_ends: (M, 2) second endpoints of the lines
+
+    Returns:
+        (N, M) array with the fraction (0, 1] along each movement segment at
+        which it crosses each line, or NaN where it does not cross
+    """
+    motion = (ends - starts)[:, None, :]
+    line = (line_ends - line_starts)[None, :, :]
+    offset = line_starts[None, :, :] - starts[:, None, :]
+
+    denom = cross(motion, line)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = cross(offset, line) / denom
+        u = cross(offset, motion) / denom
+    hit = (denom != 0) & (t > 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    return np.where(hit, t, np.nan)
+
+class SpeedTrap:
+    """
+    Measures one speed per vehicle pass from the times its centroid crosses
+    virtual lines a known distance apart
+    """
+    def __init__(self, lines, max_age_frames=30):
+        """
+        Initialize the speed trap
+
+        Args:
+            lines: List of dictionaries with 'points' ([[x1, y1], [x2, y2]] in
+                   pixels) and 'distance_m' (position of the line along the road
+                   in metres). At least two lines are required.
+            max_age_frames: Frames after which an unseen vehicle is forgotten
+        """
+        if len(lines) < 2:
+            raise ValueError("A speed trap needs at least two lines")
+        points = np.array([line['points'] for line in lines], dtype=np.float64).reshape(-1, 2, 2)
+        self.line_starts = points[:, 0]
+        self.line_ends = points[:, 1]
+        self.distances = np.array([line['distance_m'] for line in lines], dtype=np.float64)
+        # Lines at both ends of the trap; a pass is complete once both are crossed
+        self.end_lines = (int(self.distances.argmin()), int(self.distances.argmax()))
+        self.max_age_frames = max_age_frames
+        self.fps = 30
+        self.objects = OrderedDict()  # Object ID -> state, least recently seen first
+
+    def set_fps(self, fps):
+        """Set the frames per second for crossing times"""
+        self.fps = fps if fps > 0 else 30
+
+    def _measure(self, crossings):
+        """Fit distance against crossing time over all crossed lines"""
+        lines = np.array(list(crossings.keys()))
+        times = np.array(list(crossings.values()))
+        distances = self.distances[lines]
+        time_spread = times - times.mean()
+        if not np.any(time_spread):
+            return 0.0
+        slope = np.dot(time_spread, distances - distances.mean()) / np.dot(time_spread, time_spread)
+        return abs(slope) * 3.6  # m/s -> km/h
+
+    def update_frame(self, ids, bboxes, frame_number):
+        """
+        Check all visible vehicles for line crossings in one vectorized pass
+
+        Args:
+            ids: Sequence of unique object IDs
+            bboxes: Bounding boxes (x1, y1, x2, y2) aligned with ids
+            frame_number: Current frame number
+
+        Returns:
+            Array of measured speeds in km/h aligned with ids (0 until a
+            vehicle has crossed both end lines)
+        """
+        ids = list(ids)
+        speeds = np.zeros(len(ids))
+        if not ids:
+            return speeds
+
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        centers = (bboxes[:, :2] + bboxes[:, 2:]) / 2
+        current_time = frame_number / self.fps
+
+        states = []
+        for obj_id, center in zip(ids, centers):
+            state = self.objects.pop(obj_id, None)
+            if state is None:
+                state = {'point': center, 'time': current_time, 'frame': frame_number,
+                         'crossings': {}, 'speed': 0.0}
+            self.objects[obj_id] = state  # Re-insert as most recently seen
+            states.append(state)
+
+        # Segment intersection of each centroid's movement with every line
+        previous = np.array([state['point'] for state in states])
+        fractions = segment_crossings(previous, centers, self.line_starts, self.line_ends)
+
+        for i, j in zip(*np.nonzero(~np.isnan(fractions))):
+            state = states[i]
+            if state['speed'] or j in state['crossings']:
+                continue
+            # Interpolate the crossing time between the two frames
+            state['crossings'][j] = state['time'] + fractions[i, j] * (current_time - state['time'])
+            if all(line in state['crossings'] for line in self.end_lines):
+                state['speed'] = self._measure(state['crossings'])
+
+        for i, state in enumerate(states):
+            state['point'] = centers[i]
+            state['time'] = current_time
+            state['frame'] = frame_number
+            speeds[i] = state['speed']
+
+        return speeds
+
+    def get_speed(self, object_id):
+        """
+        Get the measured speed of a vehicle
+
+        Returns:
+            Speed in km/h, or 0 if not measured yet
+        """
+        state = self.objects.get(object_id)
+        return state['speed'] if state else 0
+
+    def cleanup_old_objects(self, current_frame_number):
+        """
+        Forget vehicles that haven't been seen recently; only expired entries
+        at the least-recently-seen end are visited
+
+        Args:
+            current_frame_number: Current frame number
+        """
+        while self.objects:
+            obj_id, state = next(iter(self.objects.items()))
+            if current_frame_number - state['frame'] <= self.max_age_frames:
+                break
+            del self.objects[obj_id]
\ No newline at end of file
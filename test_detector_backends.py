@@ -0,0 +1,65 @@
+# Parity check between the ultralytics and onnxruntime detection backends
+import os
+import glob
+import cv2
+import numpy as np
+from models.detector_backends import UltralyticsBackend, OnnxRuntimeBackend
+
+MODEL_NAME = 'yolov8n'
+SAMPLE_DIR = os.environ.get('DETECTOR_SAMPLE_DIR')
+
+
+def load_sample_frames():
+    """Load frames from DETECTOR_SAMPLE_DIR, or the images bundled with ultralytics"""
+    sample_dir = SAMPLE_DIR
+    if sample_dir is None:
+        try:
+            from ultralytics.yolo.utils import ROOT
+        except ImportError:
+            from ultralytics.utils import ROOT
+        sample_dir = str(ROOT / 'assets')
+    paths = sorted(glob.glob(os.path.join(sample_dir, '*.jpg')))
+    return [cv2.imread(path) for path in paths]
+
+
+def box_iou(box, boxes):
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / (area + areas - intersection)
+
+
+def test_backend_parity():
+    frames = load_sample_frames()
+    assert frames, "No sample frames found"
+
+    onnx_path = f"{MODEL_NAME}.onnx"
+    if not os.path.exists(onnx_path):
+        from ultralytics import YOLO
+        onnx_path = YOLO(MODEL_NAME).export(format='onnx', dynamic=True)
+
+    # Detect all classes so the sample images (people, buses) give enough boxes
+    reference = UltralyticsBackend(MODEL_NAME, confidence_threshold=0.25)
+    candidate = OnnxRuntimeBackend(onnx_path, confidence_threshold=0.25, dynamic=True)
+
+    for frame, expected, actual in zip(frames, reference.predict(frames), candidate.predict(frames)):
+        print(f"Frame {frame.shape}: ultralytics {len(expected)} boxes, onnxruntime {len(actual)} boxes")
+        assert abs(len(expected) - len(actual)) <= 1
+
+        # Every confident reference box needs a same-class match in the ONNX output
+        for row in expected[expected[:, 4] > 0.4]:
+            same_class = actual[actual[:, 5] == row[5]]
+            assert len(same_class), f"No class {int(row[5])} box from onnxruntime"
+            ious = box_iou(row[:4], same_class[:, :4])
+            best = ious.argmax()
+            assert ious[best] > 0.9
+            assert abs(same_class[best, 4] - row[4]) < 0.05
+
+
+if __name__ == "__main__":
+    test_backend_parity()
+    print("Backends agree")
\ No newline at end of file
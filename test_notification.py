@@ -1,6 +1,7 @@
 # Save this as test_notification.py in your project root
 from utils.notification import NotificationSystem  # Adjust import based on your implementation
 import datetime
+import time
 
 def test_notification():
     print("Testing notification system...")
@@ -25,5 +26,107 @@ def test_notification():
     except Exception as e:
         print(f"Error sending notification: {e}")
 
+def start_smtp_server(port=8025):
+    """Run a local aiosmtpd server that records received messages and connections"""
+    from aiosmtpd.controller import Controller
+    
+    class Handler:
+        def __init__(self):
+            self.messages = []
+            self.connections = 0  # Greetings seen; smtplib greets once per connection
+        
+        async def handle_EHLO(self, server, session, envelope, hostname, responses):
+            self.connections += 1
+            session.host_name = hostname
+            return responses
+        
+        async def handle_HELO(self, server, session, envelope, hostname):
+            self.connections += 1
+            session.host_name = hostname
+            return f'250 {server.hostname}'
+        
+        async def handle_DATA(self, server, session, envelope):
+            self.messages.append(envelope.content.decode())
+            return '250 Message accepted'
+    
+    handler = Handler()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    return controller, handler
+
+def make_violation(plate):
+    return {
+        "license_plate": plate,
+        "speed": 85.5,
+        "speed_limit": 60.0,
+        "location": "Test Location",
+        "timestamp": datetime.datetime.now(),
+        "image_path": None
+    }
+
+def test_dispatcher_reuses_connection():
+    controller, handler = start_smtp_server()
+    try:
+        notification = NotificationSystem({
+            "smtp_server": "127.0.0.1",
+            "smtp_port": 8025,
+            "sender": "detector@example.com",
+            "recipient": "police@example.com",
+            "use_tls": False
+        })
+        for i in range(5):
+            assert notification.send_violation_notification(make_violation(f"TEST{i:03d}"))
+        notification.close()
+        
+        print(f"Received {len(handler.messages)} emails over {handler.connections} connection(s)")
+        assert len(handler.messages) == 5
+        assert handler.connections == 1
+    finally:
+        controller.stop()
+
+def test_digest_mode():
+    controller, handler = start_smtp_server()
+    try:
+        notification = NotificationSystem({
+            "smtp_server": "127.0.0.1",
+            "port": 8025,
+            "sender": "detector@example.com",
+            "recipients": ["police@example.com"],
+            "use_tls": False
+        }, digest_interval=0.5)
+        start = time.time()
+        for i in range(3):
+            notification.send_violation_notification(make_violation(f"DIGEST{i}"))
+        notification.close()
+        
+        print(f"Digest of 3 violations sent as {len(handler.messages)} email(s) in {time.time() - start:.2f} s")
+        assert len(handler.messages) == 1
+        assert all(f"DIGEST{i}" in handler.messages[0] for i in range(3))
+    finally:
+        controller.stop()
+
+def test_retry_after_server_outage():
+    notification = NotificationSystem({
+        "smtp_server": "127.0.0.1",
+        "port": 8026,
+        "sender": "detector@example.com",
+        "recipients": ["police@example.com"],
+        "use_tls": False
+    }, max_retries=4, retry_backoff=0.2)
+    
+    # The server comes up while the dispatcher is backing off
+    notification.send_violation_notification(make_violation("RETRY1"))
+    time.sleep(0.3)
+    controller, handler = start_smtp_server(8026)
+    try:
+        notification.close()
+        print(f"Delivered after outage: {len(handler.messages)} email(s)")
+        assert len(handler.messages) == 1
+    finally:
+        controller.stop()
+
 if __name__ == "__main__":
-    test_notification()
\ No newline at end of file
+    test_notification()
+    test_dispatcher_reuses_connection()
+    test_digest_mode()
+    test_retry_after_server_outage()
\ No newline at end of file
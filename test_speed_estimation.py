@@ -0,0 +1,86 @@
+# Recorded speeds of synthetic vehicles checked against their ground-truth speed
+import numpy as np
+from models.tracker import ObjectTracker
+from models.speed_estimator import SpeedEstimator
+
+FPS = 30
+DISTANCE_CALIBRATION = 10.0  # Pixels per metre
+SPEED_LIMIT = 50.0
+
+
+def drive(pixels_per_frame, frames=15, use_tracker_velocity=True, box_size=60):
+    """
+    Track one vehicle moving horizontally at a constant speed, the way
+    VehicleDetectionSystem.track_frame does
+
+    Returns:
+        List of (object ID, speed in km/h) per frame
+    """
+    tracker = ObjectTracker()
+    estimator = SpeedEstimator(distance_calibration=DISTANCE_CALIBRATION)
+    estimator.set_fps(FPS)
+
+    results = []
+    for frame_number in range(frames):
+        x = 100 + pixels_per_frame * frame_number
+        detection = {'bbox': (x, 200, x + box_size, 200 + box_size), 'confidence': 0.9, 'class_id': 2}
+        tracked = tracker.update([detection], frame_number)
+        obj_ids = list(tracked)
+        velocities = [tracked[obj_id]['velocity'] for obj_id in obj_ids] if use_tracker_velocity else None
+        speeds = estimator.update_frame(
+            obj_ids, [tracked[obj_id]['bbox'] for obj_id in obj_ids], frame_number, velocities
+        )
+        results.append((obj_ids[0], float(speeds[0])))
+    return results
+
+
+def test_recorded_speed_matches_ground_truth():
+    for pixels_per_frame in (4, 8, 30):
+        expected = pixels_per_frame / DISTANCE_CALIBRATION * FPS * 3.6
+        for use_tracker_velocity in (True, False):
+            results = drive(pixels_per_frame, use_tracker_velocity=use_tracker_velocity)
+            # The speed a violation would be recorded with: the first one over the limit
+            recorded = next((speed for _, speed in results if speed > SPEED_LIMIT), None)
+            print(f"{pixels_per_frame} px/frame, tracker velocity {use_tracker_velocity}: "
+                  f"expected {expected:.1f} km/h, recorded {recorded}")
+            if expected > SPEED_LIMIT:
+                assert recorded is not None
+                assert abs(recorded - expected) / expected < 0.03
+            else:
+                assert recorded is None
+            # Every speed after the first sighting stays on the true value
+            assert all(abs(speed - expected) / expected < 0.03 for _, speed in results[1:])
+
+
+def test_fast_vehicle_keeps_its_id():
+    # A 60 px box moving 45 px per frame never overlaps its previous box enough for IoU
+    results = drive(45, frames=10)
+    assert len({obj_id for obj_id, _ in results}) == 1
+    expected = 45 / DISTANCE_CALIBRATION * FPS * 3.6
+    assert np.isclose(results[-1][1], expected, rtol=0.03)
+
+
+def test_skipped_frames_keep_the_speed():
+    # On frames where detection is skipped track_frame reads get_speed, which
+    # must match what the last measured update returned
+    for use_tracker_velocity in (True, False):
+        tracker = ObjectTracker()
+        estimator = SpeedEstimator(distance_calibration=DISTANCE_CALIBRATION)
+        estimator.set_fps(FPS)
+        for frame_number in range(8):
+            x = 100 + (8 + frame_number % 3) * frame_number
+            detection = {'bbox': (x, 200, x + 60, 260), 'confidence': 0.9, 'class_id': 2}
+            tracked = tracker.update([detection], frame_number)
+            obj_ids = list(tracked)
+            velocities = [tracked[obj_id]['velocity'] for obj_id in obj_ids] if use_tracker_velocity else None
+            speeds = estimator.update_frame(
+                obj_ids, [tracked[obj_id]['bbox'] for obj_id in obj_ids], frame_number, velocities
+            )
+            assert np.isclose(estimator.get_speed(obj_ids[0]), speeds[0])
+
+
+if __name__ == "__main__":
+    test_recorded_speed_matches_ground_truth()
+    test_fast_vehicle_keeps_its_id()
+    test_skipped_frames_keep_the_speed()
+    print("All speed estimation tests passed")
\ No newline at end of file
@@ -1,83 +1,403 @@
-import time
 import numpy as np
 
+class KalmanBoxFilter:
+    """
+    Constant-velocity Kalman filters for many bounding boxes, packed into
+    NumPy arrays indexed by slot
+    
+    The state of each slot is (cx, cy, w, h, vcx, vcy, vw, vh) in pixels and
+    pixels per frame.
+    """
+    def __init__(self, capacity=64, position_noise=1.0 / 20, velocity_noise=1.0 / 160, initial_velocity=1.0):
+        """
+        Initialize the filter bank
+        
+        Args:
+            capacity: Initial number of slots (grows as needed)
+            position_noise: Position noise standard deviation relative to box height
+            velocity_noise: Velocity noise standard deviation relative to box height
+            initial_velocity: Velocity standard deviation of a new filter relative
+                              to box height, large enough that the second
+                              measurement sets the velocity almost directly
+        """
+        self.position_noise = position_noise
+        self.velocity_noise = velocity_noise
+        self.initial_velocity = initial_velocity
+        self.state = np.zeros((capacity, 8))
+        self.covariance = np.zeros((capacity, 8, 8))
+        self.frame = np.zeros(capacity, dtype=np.int64)  # Frame each slot's state refers to
+        self.free_slots = list(range(capacity - 1, -1, -1))
+    
+    @staticmethod
+    def _to_measurement(bboxes):
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        return np.column_stack([
+            (bboxes[:, 0] + bboxes[:, 2]) / 2,
+            (bboxes[:, 1] + bboxes[:, 3]) / 2,
+            bboxes[:, 2] - bboxes[:, 0],
+            bboxes[:, 3] - bboxes[:, 1]
+        ])
+    
+    def _grow(self):
+        capacity = len(self.state)
+        self.state = np.concatenate([self.state, np.zeros_like(self.state)])
+        self.covariance = np.concatenate([self.covariance, np.zeros_like(self.covariance)])
+        self.frame = np.concatenate([self.frame, np.zeros_like(self.frame)])
+        self.free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+    
+    def add(self, bbox, frame_number):
+        """
+        Start a filter for a new box
+        
+        Args:
+            bbox: Bounding box (x1, y1, x2, y2)
+            frame_number: Frame number of the measurement
+            
+        Returns:
+            Slot index of the new filter
+        """
+        if not self.free_slots:
+            self._grow()
+        slot = self.free_slots.pop()
+        
+        measurement = self._to_measurement(bbox)[0]
+        height = max(measurement[3], 1.0)
+        self.state[slot] = np.concatenate([measurement, np.zeros(4)])
+        self.covariance[slot] = np.diag(np.concatenate([
+            np.full(4, (2 * self.position_noise * height) ** 2),
+            np.full(4, (self.initial_velocity * height) ** 2)
+        ]))
+        self.frame[slot] = frame_number
+        return slot
+    
+    def remove(self, slot):
+        """Release a slot for reuse"""
+        self.free_slots.append(slot)
+    
+    def predict(self, slots, frame_number):
+        """
+        Advance the given filters to a frame number
+        
+        Args:
+            slots: Array of slot indices
+            frame_number: Frame number to predict to
+            
+        Returns:
+            (N, 4) array of predicted boxes (x1, y1, x2, y2)
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        dt = np.maximum(frame_number - self.frame[slots], 0).astype(np.float64)
+        
+        transition = np.tile(np.eye(8), (len(slots), 1, 1))
+        transition[:, np.arange(4), np.arange(4, 8)] = dt[:, None]
+        
+        state = np.einsum('nij,nj->ni', transition, self.state[slots])
+        height = np.maximum(state[:, 3], 1.0)
+        noise = np.concatenate([
+            np.repeat(((self.position_noise * height) ** 2)[:, None], 4, axis=1),
+            np.repeat(((self.velocity_noise * height) ** 2)[:, None], 4, axis=1)
+        ], axis=1) * dt[:, None]
+        covariance = transition @ self.covariance[slots] @ transition.transpose(0, 2, 1)
+        covariance[:, np.arange(8), np.arange(8)] += noise
+        
+        self.state[slots] = state
+        self.covariance[slots] = covariance
+        self.frame[slots] = frame_number
+        return self.boxes(slots)
+    
+    def update(self, slots, bboxes):
+        """
+        Correct the given filters with measured boxes (already predicted to
+        the measurement frame)
+        
+        Args:
+            slots: Array of slot indices
+            bboxes: (N, 4) array of measured boxes (x1, y1, x2, y2)
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        if len(slots) == 0:
+            return
+        measurement = self._to_measurement(bboxes)
+        state = self.state[slots]
+        covariance = self.covariance[slots]
+        
+        height = np.maximum(measurement[:, 3], 1.0)
+        innovation_cov = covariance[:, :4, :4].copy()
+        innovation_cov[:, np.arange(4), np.arange(4)] += ((self.position_noise * height) ** 2)[:, None]
+        gain = covariance[:, :, :4] @ np.linalg.inv(innovation_cov)
+        
+        self.state[slots] = state + np.einsum('nij,nj->ni', gain, measurement - state[:, :4])
+        self.covariance[slots] = covariance - gain @ covariance[:, :4, :]
+    
+    def boxes(self, slots):
+        """
+        Get the current boxes of the given filters
+        
+        Returns:
+            (N, 4) array of boxes (x1, y1, x2, y2)
+        """
+        state = self.state[np.asarray(slots, dtype=np.int64)]
+        half_size = np.maximum(state[:, 2:4], 1.0) / 2
+        return np.concatenate([state[:, :2] - half_size, state[:, :2] + half_size], axis=1)
+    
+    def velocities(self, slots):
+        """
+        Get the filtered centroid velocities of the given filters
+        
+        Returns:
+            (N, 2) array of (vx, vy) in pixels per frame
+        """
+        return self.state[np.asarray(slots, dtype=np.int64), 4:6].copy()
+
 class ObjectTracker:
     """
-    Simple IOU-based tracker for vehicles
+    IOU-based tracker for vehicles with a constant-velocity Kalman motion model
+    
+    Detections left unmatched by IOU (typically a new track's second sighting
+    of a fast vehicle, before the filter knows its velocity) are matched to
+    the nearest leftover track by centroid distance relative to box size.
     """
-    def __init__(self, iou_threshold=0.3, max_age=1.0):
+    def __init__(self, iou_threshold=0.3, max_age_frames=30, max_center_distance=1.0, velocity_min_hits=3):
         """
         Initialize the tracker
         
         Args:
             iou_threshold: Minimum IOU to consider it's the same object
-            max_age: Maximum time (in seconds) to keep tracking an object after it disappears
+            max_age_frames: Maximum number of frames to keep tracking an object after it disappears
+            max_center_distance: Maximum centroid distance, relative to the larger
+                                 side of the predicted box, for the fallback match
+            velocity_min_hits: Matched detections before a track reports its
+                               filtered velocity (None until then)
         """
         self.tracked_objects = {}  # Dictionary of tracked objects
         self.next_id = 0  # Next available object ID
         self.iou_threshold = iou_threshold
-        self.max_age = max_age
+        self.max_age_frames = max_age_frames
+        self.max_center_distance = max_center_distance
+        self.velocity_min_hits = velocity_min_hits
+        self.frame_number = -1  # Frame clock used for track aging
+        self.active_ids = set()  # Objects matched by the last update
+        self.kalman = KalmanBoxFilter()  # Motion state of every track, indexed by its 'slot'
+    
+    def _advance_clock(self, frame_number):
+        if frame_number is None:
+            self.frame_number += 1
+        else:
+            self.frame_number = frame_number
+    
+    def _store_velocities(self, obj_ids):
+        if not obj_ids:
+            return
+        slots = [self.tracked_objects[obj_id]['slot'] for obj_id in obj_ids]
+        for obj_id, velocity in zip(obj_ids, self.kalman.velocities(slots).tolist()):
+            tracked = self.tracked_objects[obj_id]
+            # The filter needs a few measurements before its velocity converges
+            tracked['velocity'] = tuple(velocity) if tracked['hits'] >= self.velocity_min_hits else None
     
-    def update(self, detections):
+    def update(self, detections, frame_number=None):
         """
         Update tracker with new detections
         
         Args:
-            detections: List of detection dictionaries with 'bbox', 'confidence', 'class_id'
+            detections: Detections, or list of detection dictionaries with 'bbox', 'confidence', 'class_id'
+            frame_number: Video frame number of the detections; if None the
+                          tracker counts one frame per call
             
         Returns:
-            Dictionary of tracked objects with their IDs
+            Dictionary of tracked objects with their IDs. Each object carries
+            its Kalman-filtered centroid 'velocity' in pixels per frame, or
+            None until it has been matched velocity_min_hits times.
         """
+        self._advance_clock(frame_number)
+        
         # Result will contain currently tracked objects
         current_tracked = {}
         
+        detections = list(detections)
+        track_ids = list(self.tracked_objects.keys())
+        
+        # Predict every track to this frame so fast vehicles still overlap
+        slots = np.array([self.tracked_objects[i]['slot'] for i in track_ids], dtype=np.int64)
+        predicted_boxes = self.kalman.predict(slots, self.frame_number)
+        
+        # IoU of every detection against every predicted track box in one pass,
+        # then a one-to-one assignment so no two detections claim the same track
+        detection_boxes = np.array([d['bbox'] for d in detections], dtype=np.float32).reshape(-1, 4)
+        iou = self.iou_matrix(detection_boxes, predicted_boxes.astype(np.float32))
+        assignment = self.assign(iou, self.iou_threshold)
+        
+        # Fall back to centroid distance for what IoU left unmatched
+        leftover_dets = np.array([i for i in range(len(detections)) if i not in assignment], dtype=np.int64)
+        matched_tracks = set(assignment.values())
+        leftover_tracks = np.array([j for j in range(len(track_ids)) if j not in matched_tracks], dtype=np.int64)
+        if len(leftover_dets) and len(leftover_tracks):
+            distance = self.center_distance_matrix(detection_boxes[leftover_dets], predicted_boxes[leftover_tracks])
+            for det_index, track_index in self.assign(-distance, -self.max_center_distance).items():
+                assignment[int(leftover_dets[det_index])] = int(leftover_tracks[track_index])
+        
+        # Correct matched tracks with their detections in one batch
+        matched = sorted(assignment.items())
+        self.kalman.update(
+            [slots[track_index] for _, track_index in matched],
+            [detections[det_index]['bbox'] for det_index, _ in matched]
+        )
+        
         # Match detections to existing tracked objects
-        for detection in detections:
+        for det_index, detection in enumerate(detections):
             bbox = detection['bbox']
-            matched = False
-            
-            # Find the best match among tracked objects
-            best_iou = self.iou_threshold
-            best_id = None
             
-            for obj_id, obj_data in self.tracked_objects.items():
-                iou = self.calculate_iou(bbox, obj_data['bbox'])
-                if iou > best_iou:
-                    best_iou = iou
-                    best_id = obj_id
-            
-            if best_id is not None:
+            track_index = assignment.get(det_index)
+            if track_index is not None:
                 # Update the tracked object
-                self.tracked_objects[best_id].update({
+                obj_id = track_ids[track_index]
+                self.tracked_objects[obj_id].update({
                     'bbox': bbox,
                     'confidence': detection['confidence'],
                     'class_id': detection['class_id'],
-                    'last_seen': time.time()
+                    'last_seen': self.frame_number,
+                    'hits': self.tracked_objects[obj_id]['hits'] + 1
                 })
-                current_tracked[best_id] = self.tracked_objects[best_id]
-                matched = True
-            
-            if not matched:
+            else:
                 # Create new tracked object
-                new_id = self.next_id
+                obj_id = self.next_id
                 self.next_id += 1
-                self.tracked_objects[new_id] = {
+                self.tracked_objects[obj_id] = {
                     'bbox': bbox,
+                    'slot': self.kalman.add(bbox, self.frame_number),
                     'confidence': detection['confidence'],
                     'class_id': detection['class_id'],
-                    'last_seen': time.time(),
-                    'first_seen': time.time()
+                    'last_seen': self.frame_number,
+                    'first_seen': self.frame_number,
+                    'hits': 1
                 }
-                current_tracked[new_id] = self.tracked_objects[new_id]
+            current_tracked[obj_id] = self.tracked_objects[obj_id]
+        
+        self._store_velocities(list(current_tracked))
         
         # Remove old tracked objects
-        current_time = time.time()
         for obj_id in list(self.tracked_objects.keys()):
-            if current_time - self.tracked_objects[obj_id]['last_seen'] > self.max_age:
+            if self.frame_number - self.tracked_objects[obj_id]['last_seen'] > self.max_age_frames:
+                self.kalman.remove(self.tracked_objects[obj_id]['slot'])
                 del self.tracked_objects[obj_id]
         
+        self.active_ids = set(current_tracked)
         return current_tracked
     
+    def predict(self, frame_number=None):
+        """
+        Advance objects matched by the last update along their Kalman motion
+        model, for frames on which detection is skipped
+        
+        Args:
+            frame_number: Video frame number; if None the tracker counts one frame per call
+            
+        Returns:
+            Dictionary of tracked objects with predicted bounding boxes
+        """
+        self._advance_clock(frame_number)
+        
+        obj_ids = [obj_id for obj_id in self.active_ids if obj_id in self.tracked_objects]
+        if not obj_ids:
+            return {}
+        
+        slots = [self.tracked_objects[obj_id]['slot'] for obj_id in obj_ids]
+        boxes = np.rint(self.kalman.predict(slots, self.frame_number)).astype(np.int64).tolist()
+        
+        predicted = {}
+        for obj_id, bbox in zip(obj_ids, boxes):
+            self.tracked_objects[obj_id]['bbox'] = tuple(bbox)
+            predicted[obj_id] = self.tracked_objects[obj_id]
+        self._store_velocities(obj_ids)
+        
+        return predicted
+    
+    def get_velocity(self, object_id):
+        """
+        Get the filtered centroid velocity of a tracked object
+        
+        Args:
+            object_id: Unique ID of tracked object
+            
+        Returns:
+            (vx, vy) in pixels per frame, or None if the object is not tracked
+            or its velocity has not converged yet
+        """
+        if object_id not in self.tracked_objects or self.tracked_objects[object_id]['hits'] < self.velocity_min_hits:
+            return None
+        return tuple(self.kalman.velocities([self.tracked_objects[object_id]['slot']])[0])
+    
+    @staticmethod
+    def iou_matrix(boxes1, boxes2):
+        """
+        Calculate the Intersection over Union between all pairs of boxes
+        
+        Args:
+            boxes1: (N, 4) array of boxes (x1, y1, x2, y2)
+            boxes2: (M, 4) array of boxes (x1, y1, x2, y2)
+            
+        Returns:
+            (N, M) array of IOU values between 0 and 1
+        """
+        x_left = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+        y_top = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+        x_right = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2])
+        y_bottom = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3])
+        
+        intersection_area = np.clip(x_right - x_left, 0, None) * np.clip(y_bottom - y_top, 0, None)
+        
+        area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+        area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+        union_area = area1[:, None] + area2[None, :] - intersection_area
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(union_area > 0, intersection_area / union_area, 0.0)
+    
+    @staticmethod
+    def center_distance_matrix(boxes1, boxes2):
+        """
+        Calculate centroid distances between all pairs of boxes, relative to
+        the larger side of the second box
+        
+        Args:
+            boxes1: (N, 4) array of boxes (x1, y1, x2, y2)
+            boxes2: (M, 4) array of boxes (x1, y1, x2, y2)
+            
+        Returns:
+            (N, M) array of relative distances
+        """
+        boxes1 = np.asarray(boxes1, dtype=np.float64)
+        boxes2 = np.asarray(boxes2, dtype=np.float64)
+        centers1 = (boxes1[:, :2] + boxes1[:, 2:]) / 2
+        centers2 = (boxes2[:, :2] + boxes2[:, 2:]) / 2
+        distance = np.hypot(centers1[:, None, 0] - centers2[None, :, 0], centers1[:, None, 1] - centers2[None, :, 1])
+        size = np.maximum((boxes2[:, 2:] - boxes2[:, :2]).max(axis=1), 1.0)
+        return distance / size[None, :]
+    
+    @staticmethod
+    def assign(iou, iou_threshold):
+        """
+        One-to-one greedy assignment by descending IOU
+        
+        Args:
+            iou: (N, M) IOU matrix between detections and tracks
+            iou_threshold: Minimum IOU for a valid match
+            
+        Returns:
+            Dictionary mapping detection indices to track indices
+        """
+        # Only overlapping pairs are candidates, so the loop is over a sparse set
+        det_indices, track_indices = np.nonzero(iou > iou_threshold)
+        order = np.argsort(-iou[det_indices, track_indices], kind='stable')
+        
+        assignment = {}
+        used_tracks = set()
+        for det_index, track_index in zip(det_indices[order].tolist(), track_indices[order].tolist()):
+            if det_index in assignment or track_index in used_tracks:
+                continue
+            assignment[det_index] = track_index
+            used_tracks.add(track_index)
+        return assignment
+    
     @staticmethod
     def calculate_iou(bbox1, bbox2):
         """